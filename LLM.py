@@ -5,6 +5,9 @@ from pydantic import BaseModel, Field
 from typing import List, Optional
 import asyncio
 import json
+import time
+from llm_cache import LLMResponseCache, make_cache_key
+from llm_metrics import metrics_callback
 from prompts import *
 
 # Define output structure for different prompt lengths
@@ -43,31 +46,69 @@ def select_template(topic: str):
     else:
         return long_template, LongResearchQuery
 
+# Every prompt in prompts.py with the output model it's parsed into. The
+# zero/one/few-shot prompts ask for the same fields as MediumResearchQuery
+TEMPLATES = {
+    'zero': (zero_template, MediumResearchQuery),
+    'one': (one_template, MediumResearchQuery),
+    'few': (few_template, MediumResearchQuery),
+    'short': (short_template, ShortResearchQuery),
+    'medium': (medium_template, MediumResearchQuery),
+    'long': (long_template, LongResearchQuery),
+}
+
+# Small Model
+# MODEL_PARAMS = {'model': 'llama3.2:3b', 'temperature': 0.3, 'seed': 42}
+# Middle Model
+MODEL_PARAMS = {'model': 'deepseek-r1:14b', 'temperature': 0.3, 'seed': 42}
+
+def build_chain(template, outputModel, model_params=MODEL_PARAMS, model_class=ChatOllama, model=None):
+    # model_class can be swapped for a stand-in such as fake_ollama.FakeChatOllama;
+    # pass model to share one (and its HTTP client) between several chains
+    prompt = ChatPromptTemplate.from_template(template)
+    if model is None:
+        # Latency and token counts of every call go to the app.metrics histograms
+        model = model_class(**model_params, callbacks=[metrics_callback])
+    structured_llm = model.with_structured_output(outputModel, method="json_schema")
+    return prompt | structured_llm
+
+async def generate_with_template(topic, template, outputModel, cache=None, model_params=MODEL_PARAMS,
+                                 timeout=60.0, model_class=ChatOllama):
+    # Run the chain for one topic, answering from the cache when the same
+    # topic, template, output model and model parameters were seen before
+    key = make_cache_key(topic, template, outputModel, model_params)
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return outputModel.model_validate(cached)
+
+    chain = build_chain(template, outputModel, model_params, model_class)
+    result = await asyncio.wait_for(chain.ainvoke({"topic": topic}), timeout)
+
+    if cache is not None:
+        cache.set(key, result.model_dump())
+    return result
+
+async def generate(topic, cache=None, model_params=MODEL_PARAMS, timeout=60.0, model_class=ChatOllama):
+    # Same as generate_with_template, with the template picked by topic length
+    template, outputModel = select_template(topic)
+    return await generate_with_template(topic, template, outputModel, cache, model_params, timeout, model_class)
+
 async def main():
     topic = "LLM"
-    template, outputModel = select_template(topic)
-    prompt = ChatPromptTemplate.from_template(template)
-    # Small Model
-    # model = ChatOllama(**{'model': 'llama3.2:3b', 'temperature': 0.3, 'seed': 42})
-    # Middle Model
-    model = ChatOllama(**{'model': 'deepseek-r1:14b', 'temperature': 0.3, 'seed': 42})
+    cache = LLMResponseCache()
 
-    structured_llm = model.with_structured_output(outputModel, method="json_schema")
-    
-    chain = prompt | structured_llm
-    
-    task = asyncio.create_task(
-        chain.ainvoke({"topic": topic})
-    )
-    
+    started = time.perf_counter()
     try:
-        await asyncio.wait_for(task, 60.0)
-        # await task
+        result = await generate(topic, cache=cache)
     except asyncio.TimeoutError:
         print("Timeout occurred")
-    
-    result = task.result().model_dump()
-    print(json.dumps(result, indent=2))
+        return
+    finally:
+        print(f"Took {time.perf_counter() - started:.3f}s, cache: {cache.stats()}")
+        cache.close()
+
+    print(json.dumps(result.model_dump(), indent=2))
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import JSONData, Article
+from .models import JSONData, Article, ImportJob
+from .changelist import EstimatedCountPaginator, admin_search, cached_choices_filter
 from django.forms import widgets
 import json
 from django.db import models
@@ -17,11 +18,12 @@ class PrettyJSONWidget(widgets.Textarea):
         except Exception as e:
             return super(PrettyJSONWidget, self).format_value(value)
 
-# In case I need it in the future (not used for now)  
+# Snapshots of imported files, see snapshots.py; data is the import summary
 @admin.register(JSONData)
 class JSONDataAdmin(admin.ModelAdmin):
-    list_display = ('id', 'name', 'created_at')
-    readonly_fields = ('created_at',)
+    list_display = ('id', 'name', 'version', 'created_at')
+    list_filter = ('name',)
+    readonly_fields = ('created_at', 'version', 'content_hash')
     formfield_overrides = {
         models.JSONField: {'widget': PrettyJSONWidget}
     }
@@ -29,6 +31,31 @@ class JSONDataAdmin(admin.ModelAdmin):
 @admin.register(Article)
 class ArticleAdmin(admin.ModelAdmin):
     list_display = ('id', 'title', 'source', 'type', 'theme', 'created_at')
-    list_filter = ('source', 'type', 'theme', 'research_paper_type')
-    search_fields = ('title', 'source', 'theme', 'country_organisation')
-    readonly_fields = ('created_at',)
\ No newline at end of file
+    # Choices come from the cached facet counts rather than a SELECT DISTINCT per filter
+    list_filter = [cached_choices_filter(field) for field in ('source', 'type', 'theme', 'research_paper_type')]
+    # Full-text index for the first three, prefix match for the rest, see get_search_results
+    search_fields = (
+        'title', 'exclusion_reason_final_level_1', 'exclusion_reason_final_level_2',
+        'source', 'theme', 'country_organisation',
+    )
+    # Matches the indexed (created_at, id) ordering used by the list API
+    ordering = ('-created_at', '-id')
+    readonly_fields = ('created_at',)
+    # A plain id box instead of a <select> of every article
+    raw_id_fields = ('duplicate_of',)
+    # Planner estimates instead of COUNT(*) on large tables, and no second
+    # count of the unfiltered table for the "x of y" line
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        # Bounded prefix search on the full-text index instead of icontains on every field
+        if not search_term.strip():
+            return queryset, False
+        return admin_search(queryset, search_term), False
+
+@admin.register(ImportJob)
+class ImportJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'kind', 'status', 'rows_done', 'rows_total', 'progress', 'created_at', 'finished_at')
+    list_filter = ('status', 'kind')
+    readonly_fields = ('created_at', 'started_at', 'heartbeat_at', 'finished_at')
@@ -0,0 +1,105 @@
+import json
+from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connection
+from django.db.models import Q
+from django.utils.functional import cached_property
+from .facets import get_facets
+from .models import Article
+from .search import match_boolean
+
+# Below this many (estimated) rows the exact COUNT(*) is cheap enough to run
+ESTIMATE_THRESHOLD = 10000
+# Most matches a changelist search returns, newest first
+ADMIN_SEARCH_LIMIT = 1000
+# Short columns outside the full-text index. The search term is matched
+# against their cached facet values, then the indexed columns are filtered
+# on the values that start with it
+PREFIX_SEARCH_FIELDS = ('source', 'theme', 'country_organisation')
+# Values offered by a filter, most common first; rare values can still be
+# picked by editing the query string
+MAX_FILTER_CHOICES = 100
+
+def estimated_count(queryset, threshold=ESTIMATE_THRESHOLD):
+    """
+    Row count of queryset from the PostgreSQL planner statistics: reltuples
+    of the table when unfiltered, the planner's row estimate otherwise. Small
+    results, tables that were never analyzed and other databases get the
+    exact count.
+    """
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+    if not queryset.query.where:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples FROM pg_class WHERE oid = %s::regclass',
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        estimate = row[0] if row else -1
+    else:
+        plan = json.loads(queryset.order_by().explain(format='json'))
+        estimate = plan[0]['Plan']['Plan Rows']
+    if estimate < threshold:
+        return queryset.count()
+    return int(estimate)
+
+class EstimatedCountPaginator(Paginator):
+    # Page links from an estimated count; a page past the real end is just empty
+    @cached_property
+    def count(self):
+        return estimated_count(self.object_list)
+
+class CachedChoicesFilter(admin.SimpleListFilter):
+    """
+    Exact-match filter on a CharField whose choices come from the cached
+    facet counts (see facets.py, refreshed when articles change) instead of
+    a SELECT DISTINCT over the table on every changelist load.
+    """
+    field = None
+
+    def lookups(self, request, model_admin):
+        counts = get_facets()[0].get(self.field, {})
+        return [
+            (value, f'{value or "(blank)"} ({count})')
+            for value, count in list(counts.items())[:MAX_FILTER_CHOICES]
+        ]
+
+    def queryset(self, request, queryset):
+        value = self.value()
+        if value is None:
+            return queryset
+        return queryset.filter(**{self.field: value})
+
+def cached_choices_filter(field):
+    return type(f'{field.title().replace("_", "")}Filter', (CachedChoicesFilter,), {
+        'field': field,
+        'parameter_name': field,
+        'title': Article._meta.get_field(field).verbose_name,
+    })
+
+def admin_search(queryset, search_term, limit=ADMIN_SEARCH_LIMIT):
+    """
+    Changelist search: an article id, or words matched through the full-text
+    index with the last one as a prefix (so "prost" finds "prostate"). The
+    AND/OR/NOT syntax of boolean_search works too. Articles whose source,
+    theme or country/organisation starts with the search term match as
+    well. Only the newest `limit` matches of each kind are kept, so counting
+    and ordering them stays cheap however common the words are.
+    """
+    search_term = search_term.strip()
+    if search_term.isdigit():
+        return queryset.filter(pk=int(search_term))
+    prefix = search_term.rstrip('*').casefold()
+    if not search_term.endswith(('*', '"', ')')):
+        search_term += '*'
+    matches = match_boolean(queryset, search_term).order_by('-created_at', '-id').values('id')[:limit]
+    condition = Q(id__in=matches)
+    facets = get_facets()[0] if prefix else {}
+    for field in PREFIX_SEARCH_FIELDS:
+        values = [value for value in facets.get(field, {}) if value and value.casefold().startswith(prefix)]
+        if values:
+            # Each walks its (field, created_at, id) index, newest first
+            prefixed = queryset.filter(**{f'{field}__in': values}).order_by('-created_at', '-id').values('id')[:limit]
+            condition |= Q(id__in=prefixed)
+    return queryset.filter(condition)
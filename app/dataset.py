@@ -0,0 +1,49 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.utils import timezone
+from .models import DatasetVersion
+
+DATASET_VERSION_CACHE_KEY = 'article_dataset_version'
+DATASET_VERSION_PK = 1
+
+def _load():
+    # (version, updated_at) from the database, creating the row if it's missing
+    row = DatasetVersion.objects.filter(pk=DATASET_VERSION_PK).values_list('version', 'updated_at').first()
+    if row is None:
+        version, _ = DatasetVersion.objects.get_or_create(
+            pk=DATASET_VERSION_PK, defaults={'version': 1, 'updated_at': timezone.now()}
+        )
+        row = (version.version, version.updated_at)
+    return row
+
+def get_dataset_version():
+    """
+    Return (version, last_modified) of the Article data. It is read from the
+    cache, so answering a conditional request costs no query; the database
+    row is only read when the cached copy has expired, every
+    DATASET_VERSION_TTL seconds, which is how processes that don't share a
+    cache pick up an import run somewhere else.
+    """
+    state = cache.get(DATASET_VERSION_CACHE_KEY)
+    if state is None:
+        state = _load()
+        cache.set(DATASET_VERSION_CACHE_KEY, state, timeout=settings.DATASET_VERSION_TTL)
+    return state
+
+def bump_dataset_version():
+    # Called once Article rows have changed; every ETag issued so far goes stale
+    DatasetVersion.objects.filter(pk=DATASET_VERSION_PK).update(
+        version=F('version') + 1, updated_at=timezone.now()
+    )
+    state = _load()
+    cache.set(DATASET_VERSION_CACHE_KEY, state, timeout=settings.DATASET_VERSION_TTL)
+    return state
+
+def dataset_etag(request, *args, **kwargs):
+    # etag_func for django.views.decorators.http.condition
+    return str(get_dataset_version()[0])
+
+def dataset_last_modified(request, *args, **kwargs):
+    # last_modified_func for condition
+    return get_dataset_version()[1]
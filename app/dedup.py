@@ -0,0 +1,199 @@
+import hashlib
+import random
+import zlib
+from collections import Counter, defaultdict
+from django.db import connection
+from .models import Article, TitleBucket
+from .normalize import TRAILING_ELLIPSIS_RE, normalize_title
+
+# NumPy only speeds up the MinHash signatures; the pure Python path gives the same result
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# 25 bands of 4 hashes: titles with a shingle Jaccard similarity of 0.5 (a title
+# cut in half by "...") become candidates ~80% of the time, at 0.8 almost always
+NUM_BANDS = 25
+BAND_ROWS = 4
+NUM_HASHES = NUM_BANDS * BAND_ROWS
+SHINGLE_SIZE = 5
+PRIME = (1 << 31) - 1
+
+# A candidate is a duplicate when the titles are nearly the same (Jaccard)...
+TITLE_THRESHOLD = 0.95
+# ...or a title truncated with "..." is almost entirely contained in a longer one...
+TRUNCATED_THRESHOLD = 0.95
+# ...or the normalized URLs are the same and the titles roughly agree
+URL_TITLE_THRESHOLD = 0.3
+# Short generic titles ("Prostate cancer") are only matched together with a URL
+MIN_TITLE_SHINGLES = 20
+
+# Candidates verified per article, the ones sharing the most buckets first, so
+# a very common title can't make the check quadratic
+MAX_CANDIDATES = 10
+QUERY_CHUNK_SIZE = 2000
+
+_rng = random.Random(3164)
+PERMUTATIONS = [(_rng.randrange(1, PRIME), _rng.randrange(0, PRIME)) for _ in range(NUM_HASHES)]
+if np is not None:
+    _A = np.array([a for a, _ in PERMUTATIONS], dtype=np.uint64)[:, None]
+    _B = np.array([b for _, b in PERMUTATIONS], dtype=np.uint64)[:, None]
+
+def shingles(title):
+    # Character 5-grams of the normalized title
+    text = normalize_title(title)
+    if len(text) <= SHINGLE_SIZE:
+        return {text} if text else set()
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+def minhash(shingle_set):
+    # NUM_HASHES minimums of universal hashes (a * x + b) mod PRIME over the shingles
+    hashes = [zlib.crc32(shingle.encode('utf-8')) % PRIME for shingle in shingle_set]
+    if np is not None:
+        values = np.array(hashes, dtype=np.uint64)[None, :]
+        return ((_A * values + _B) % PRIME).min(axis=1).tolist()
+    return [min((a * x + b) % PRIME for x in hashes) for a, b in PERMUTATIONS]
+
+def band_buckets(signature):
+    # One signed 64-bit bucket per band; the band number is part of the key
+    buckets = []
+    for band in range(NUM_BANDS):
+        rows = signature[band * BAND_ROWS:(band + 1) * BAND_ROWS]
+        key = f'{band}:' + ','.join(str(value) for value in rows)
+        digest = hashlib.blake2b(key.encode('ascii'), digest_size=8).digest()
+        buckets.append(int.from_bytes(digest, 'big', signed=True))
+    return buckets
+
+def title_buckets(title):
+    shingle_set = shingles(title)
+    return band_buckets(minhash(shingle_set)) if shingle_set else []
+
+def is_truncated(title):
+    return bool(TRAILING_ELLIPSIS_RE.search((title or '').strip()))
+
+def is_duplicate(article, other, article_shingles, other_shingles):
+    # Exact check of an LSH or URL candidate pair
+    same_url = bool(article.url_key) and article.url_key == other.url_key
+    if not article_shingles or not other_shingles:
+        # No title to compare, so only a shared URL counts
+        return same_url
+    overlap = len(article_shingles & other_shingles)
+    jaccard = overlap / len(article_shingles | other_shingles)
+    if same_url:
+        return jaccard >= URL_TITLE_THRESHOLD
+    if min(len(article_shingles), len(other_shingles)) < MIN_TITLE_SHINGLES:
+        return False
+    if jaccard >= TITLE_THRESHOLD:
+        return True
+    # A truncated title has to be the shorter one and (almost) a part of the other
+    for title, short, full in ((article.title, article_shingles, other_shingles),
+                               (other.title, other_shingles, article_shingles)):
+        if is_truncated(title) and len(short) < len(full) and overlap / len(short) >= TRUNCATED_THRESHOLD:
+            return True
+    return False
+
+def _chunks(values, size=QUERY_CHUNK_SIZE):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+def find_candidates(articles, buckets):
+    # Earlier articles sharing a title bucket or a URL with each article
+    by_bucket = defaultdict(set)
+    for chunk in _chunks({bucket for values in buckets.values() for bucket in values}):
+        for article_id, bucket in TitleBucket.objects.filter(bucket__in=chunk).values_list('article_id', 'bucket'):
+            by_bucket[bucket].add(article_id)
+    by_url = defaultdict(set)
+    for chunk in _chunks({article.url_key for article in articles if article.url_key}):
+        for article_id, key in Article.objects.filter(url_key__in=chunk).values_list('id', 'url_key'):
+            by_url[key].add(article_id)
+
+    candidates = {}
+    for article in articles:
+        # Sharing more bands means a higher estimated similarity; a shared URL beats any
+        shared = Counter()
+        for bucket in buckets[article.id]:
+            shared.update(by_bucket[bucket])
+        if article.url_key:
+            shared.update(dict.fromkeys(by_url[article.url_key], NUM_BANDS + 1))
+        earlier = [(count, pk) for pk, count in shared.items() if pk < article.id]
+        earlier.sort(key=lambda item: (-item[0], item[1]))
+        candidates[article.id] = [pk for _, pk in earlier[:MAX_CANDIDATES]]
+    return candidates
+
+def flag_duplicates(articles, batch_size=500):
+    """
+    Near-duplicate stage of ingestion, run on newly saved Articles (which
+    have ids but no title buckets yet). Their buckets are written, then each
+    one is compared with the earlier articles that share a bucket or a
+    normalized URL, and duplicate_of is pointed at the earliest article of
+    the matching cluster. Returns the number of articles flagged.
+    """
+    articles = sorted(articles, key=lambda article: article.id)
+    if not articles:
+        return 0
+    buckets = {article.id: title_buckets(article.title) for article in articles}
+    # NUM_BANDS rows per article: a plain executemany skips building a model
+    # instance for each, which is most of the cost of bulk_create here
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO {TitleBucket._meta.db_table} (article_id, bucket) VALUES (%s, %s)',
+            [(pk, bucket) for pk, values in buckets.items() for bucket in values],
+        )
+
+    candidates = find_candidates(articles, buckets)
+    others = {}
+    for chunk in _chunks({pk for values in candidates.values() for pk in values}):
+        others.update(Article.objects.only('id', 'title', 'url_key', 'duplicate_of').in_bulk(chunk))
+    shingle_cache = {}
+
+    def shingles_of(article):
+        if article.id not in shingle_cache:
+            shingle_cache[article.id] = shingles(article.title)
+        return shingle_cache[article.id]
+
+    # Canonical article of everything decided in this run, in id order, so
+    # copies within the same batch point at the first of them. The best
+    # candidate that passes the check decides the cluster
+    canonical = {}
+    flagged_articles = []
+    flagged = 0
+    for article in articles:
+        match = None
+        for pk in candidates[article.id]:
+            other = others.get(pk)
+            if other is not None and is_duplicate(article, other, shingles_of(article), shingles_of(other)):
+                match = canonical.get(pk, other.duplicate_of_id or other.id)
+                break
+        canonical[article.id] = match or article.id
+        if match:
+            flagged += 1
+            article.duplicate_of_id = match
+            flagged_articles.append(article)
+    Article.objects.bulk_update(flagged_articles, ['duplicate_of'], batch_size=batch_size)
+    return flagged
+
+def duplicate_clusters(queryset=None):
+    """
+    Clusters of flagged duplicates as a list of dicts with the canonical
+    article and its copies, largest cluster first.
+    """
+    queryset = Article.objects.all() if queryset is None else queryset
+    members = defaultdict(list)
+    rows = queryset.filter(duplicate_of__isnull=False).order_by('id').values('id', 'duplicate_of', 'source', 'title')
+    for row in rows.iterator(chunk_size=QUERY_CHUNK_SIZE):
+        members[row.pop('duplicate_of')].append(row)
+
+    canonical = {}
+    for chunk in _chunks(members):
+        canonical.update(
+            (row['id'], row) for row in Article.objects.filter(id__in=chunk).values('id', 'source', 'title')
+        )
+    clusters = [
+        {'article': canonical[pk], 'duplicates': copies}
+        for pk, copies in members.items()
+        if pk in canonical
+    ]
+    clusters.sort(key=lambda cluster: (-len(cluster['duplicates']), cluster['article']['id']))
+    return clusters
@@ -0,0 +1,58 @@
+import csv
+import io
+from datetime import date, datetime
+from django.core.serializers.json import DjangoJSONEncoder
+
+DEFAULT_CHUNK_SIZE = 2000
+
+def iter_rows(queryset, fields, chunk_size=DEFAULT_CHUNK_SIZE):
+    # Tuples of the requested fields in id order. iterator() uses a server-side
+    # cursor on PostgreSQL, so only chunk_size rows are held in memory at once
+    return queryset.order_by('id').values_list(*fields).iterator(chunk_size=chunk_size)
+
+def _csv_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return '' if value is None else value
+
+def iter_csv(queryset, fields, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Yield the articles as CSV text: the header line first, then one string
+    per chunk_size rows, so a response starts before the query is done and
+    its size never depends on the number of rows.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    # Sent before the query runs, so the client gets bytes right away
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    count = 0
+    for row in iter_rows(queryset, fields, chunk_size):
+        writer.writerow([_csv_value(value) for value in row])
+        count += 1
+        if count % chunk_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+def iter_jsonl(queryset, fields, chunk_size=DEFAULT_CHUNK_SIZE):
+    # One JSON object per line, chunked the same way as iter_csv
+    encoder = DjangoJSONEncoder()
+    lines = []
+    for row in iter_rows(queryset, fields, chunk_size):
+        lines.append(encoder.encode(dict(zip(fields, row))))
+        if len(lines) >= chunk_size:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+# ?format= -> (row writer, content type, file extension)
+EXPORT_FORMATS = {
+    'csv': (iter_csv, 'text/csv; charset=utf-8', 'csv'),
+    'jsonl': (iter_jsonl, 'application/x-ndjson; charset=utf-8', 'jsonl'),
+}
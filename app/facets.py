@@ -0,0 +1,72 @@
+from django.core.cache import cache
+from django.db.models import Count
+from .dataset import get_dataset_version
+from .models import Article
+
+# Fields counted for the screening dashboard (and the admin filter choices
+# and prefix search)
+FACET_FIELDS = [
+    'theme',
+    'source',
+    'type',
+    'research_paper_type',
+    'country_organisation',
+    'final_level_1_consensus',
+    'final_level_2_consensus',
+]
+
+FACETS_CACHE_KEY = 'article_facets'
+HITS_CACHE_KEY = 'article_facets:hits'
+MISSES_CACHE_KEY = 'article_facets:misses'
+
+def compute_facets():
+    # One GROUP BY per field: {field: {value: count}}, most common values first
+    facets = {}
+    for field in FACET_FIELDS:
+        rows = Article.objects.values(field).annotate(count=Count('id')).order_by('-count', field)
+        facets[field] = {row[field]: row['count'] for row in rows}
+    return facets
+
+def _increment(key):
+    # add() is a no-op if the counter already exists, so incr() always has a key
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # The counter was evicted between add() and incr()
+        cache.set(key, 1, timeout=None)
+
+def facets_cache_key():
+    # Keyed by the dataset version, so an import in another process (which
+    # can't reach this process's cache) still retires the old counts
+    return f'{FACETS_CACHE_KEY}:{get_dataset_version()[0]}'
+
+def get_facets():
+    """
+    Return (facets, hit) where hit tells whether the counts came from the
+    cache. Counts are computed once per dataset version and then served from
+    the cache until the version changes or invalidate_facets() is called.
+    """
+    key = facets_cache_key()
+    facets = cache.get(key)
+    if facets is not None:
+        _increment(HITS_CACHE_KEY)
+        return facets, True
+
+    _increment(MISSES_CACHE_KEY)
+    facets = compute_facets()
+    cache.set(key, facets, timeout=None)
+    return facets, False
+
+def invalidate_facets():
+    cache.delete(facets_cache_key())
+
+def facet_cache_stats():
+    hits = cache.get(HITS_CACHE_KEY, 0)
+    misses = cache.get(MISSES_CACHE_KEY, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / total, 4) if total else None,
+    }
@@ -0,0 +1,190 @@
+import time
+from contextlib import nullcontext
+from datetime import datetime
+from django.db import transaction
+from django.utils import timezone
+from .dedup import flag_duplicates
+from .models import Article
+from .normalize import article_fingerprint, url_key
+from .signals import articles_changed
+from .vectors import update_vector_index
+
+DEFAULT_BATCH_SIZE = 500
+
+# Column headers used by the screening export, mapped to the Article field they fill
+FIELD_MAP = {
+    'Source': 'source',
+    'Type': 'type',
+    'URL': 'url',
+    'Final Level 1 Consensus': 'final_level_1_consensus',
+    'Exclusion Reason Final Level 1': 'exclusion_reason_final_level_1',
+    'Final Level 2 Consensus': 'final_level_2_consensus',
+    'Exclusion Reason Final Level 2': 'exclusion_reason_final_level_2',
+    'Title': 'title',
+    'Theme': 'theme',
+    'Research Paper Type': 'research_paper_type',
+    'Country/ Organisation': 'country_organisation',
+}
+
+# Fields compared to decide whether a re-imported article has changed
+ARTICLE_FIELDS = ['date_access', *FIELD_MAP.values()]
+
+def parse_date_access(value):
+    # Handle date format conversion if the date is provided
+    if not value:
+        return None
+    if not isinstance(value, datetime):
+        try:
+            value = datetime.strptime(value, '%Y-%m-%d %H:%M:%S')
+        except (TypeError, ValueError):
+            # Keep as None if date format is invalid
+            return None
+    # Dates in the export are local to the project's TIME_ZONE
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value
+
+def build_article(article_data):
+    # Build (but don't save) an Article from one row of the export
+    fields = {}
+    for header, field in FIELD_MAP.items():
+        value = article_data.get(header)
+        # Spreadsheet cells can hold numbers, but every mapped field is text
+        fields[field] = '' if value is None else str(value)
+    article = Article(date_access=parse_date_access(article_data.get('Date Access')), **fields)
+    article.fingerprint = article_fingerprint(article.url, article.title, article.source)
+    article.url_key = url_key(article.url)
+    return article
+
+def copy_changed_fields(target, source):
+    # Copy the imported values onto target, returning the fields that differed
+    changed = []
+    for field in ARTICLE_FIELDS:
+        value = getattr(source, field)
+        if getattr(target, field) != value:
+            setattr(target, field, value)
+            changed.append(field)
+    return changed
+
+def iter_batches(rows, batch_size):
+    # Group any iterable of rows into lists of at most batch_size rows
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def upsert_batch(rows, batch_size, seen, updated_ids):
+    """
+    Write one batch keyed by fingerprint: new articles are bulk inserted,
+    changed ones bulk updated and unchanged ones left alone. Existing rows
+    are found with a single indexed lookup for the whole batch. seen holds
+    the fingerprints already handled by this import; when the file repeats
+    an article the first occurrence wins and later ones count as duplicates.
+    The ids of updated articles are appended to updated_ids. New articles
+    go through the near-duplicate stage (dedup.flag_duplicates); updated ones
+    keep their flag, as the fingerprint pins their normalized URL and title.
+    """
+    incoming = {}
+    counts = {'created': 0, 'updated': 0, 'unchanged': 0, 'duplicates': 0, 'near_duplicates': 0}
+    for row in rows:
+        article = build_article(row)
+        if article.fingerprint in seen:
+            counts['duplicates'] += 1
+            continue
+        seen.add(article.fingerprint)
+        incoming[article.fingerprint] = article
+
+    existing = Article.objects.only('id', 'fingerprint', *ARTICLE_FIELDS).in_bulk(
+        list(incoming), field_name='fingerprint'
+    )
+    to_create = []
+    to_update = []
+    changed_fields = set()
+    for fingerprint, article in incoming.items():
+        current = existing.get(fingerprint)
+        if current is None:
+            to_create.append(article)
+            continue
+        changed = copy_changed_fields(current, article)
+        if changed:
+            to_update.append(current)
+            changed_fields.update(changed)
+        else:
+            counts['unchanged'] += 1
+
+    Article.objects.bulk_create(to_create, batch_size=batch_size)
+    if to_update:
+        # bulk_update writes a CASE over the batch for every field it's given,
+        # so only pass the fields that changed somewhere in the batch
+        fields = [field for field in ARTICLE_FIELDS if field in changed_fields]
+        Article.objects.bulk_update(to_update, fields, batch_size=batch_size)
+    counts['near_duplicates'] += flag_duplicates(to_create, batch_size)
+    counts['created'] += len(to_create)
+    counts['updated'] += len(to_update)
+    updated_ids.extend(article.id for article in to_update)
+    return counts
+
+def ingest_articles(rows, batch_size=DEFAULT_BATCH_SIZE, atomic=True, progress=None):
+    """
+    Upsert rows as Articles, one bulk write per batch. By default everything
+    runs inside a single transaction, so a failure part way leaves no partial
+    import. With atomic=False every batch commits on its own (as background
+    jobs do, so their progress is visible); a failed run can simply be
+    repeated, as rows that were already imported are left unchanged.
+    progress, if given, is called as progress(rows_done, totals) inside each
+    batch's transaction. Returns the counts and timings of the run.
+    """
+    if batch_size < 1:
+        raise ValueError('batch_size must be a positive integer')
+
+    batch_timings = []
+    totals = {'created': 0, 'updated': 0, 'unchanged': 0, 'duplicates': 0, 'near_duplicates': 0}
+    seen = set()
+    updated_ids = []
+    count = 0
+    started = time.perf_counter()
+
+    with transaction.atomic() if atomic else nullcontext():
+        try:
+            for number, batch in enumerate(iter_batches(rows, batch_size), start=1):
+                batch_started = time.perf_counter()
+                # Joins the outer transaction, or commits this batch when not atomic
+                with transaction.atomic(savepoint=False):
+                    counts = upsert_batch(batch, batch_size, seen, updated_ids)
+                    for key, value in counts.items():
+                        totals[key] += value
+                    count += len(batch)
+                    if progress is not None:
+                        progress(count, totals)
+                batch_timings.append({
+                    'batch': number,
+                    'rows': len(batch),
+                    **counts,
+                    'seconds': round(time.perf_counter() - batch_started, 4),
+                })
+        finally:
+            # Bulk writes send no model signals, so refresh derived caches
+            # explicitly; batches committed before a failure count too
+            if totals['created'] or totals['updated']:
+                transaction.on_commit(articles_changed)
+                # New articles are picked up by id, updated ones may have a new title
+                transaction.on_commit(lambda: update_vector_index(updated_ids))
+
+    elapsed = time.perf_counter() - started
+    return {
+        'rows_processed': count,
+        'articles_created': totals['created'],
+        'articles_updated': totals['updated'],
+        'articles_unchanged': totals['unchanged'],
+        'duplicate_rows': totals['duplicates'],
+        'near_duplicates_flagged': totals['near_duplicates'],
+        'batch_size': batch_size,
+        'batches': len(batch_timings),
+        'elapsed_seconds': round(elapsed, 4),
+        'rows_per_sec': round(count / elapsed, 1) if elapsed > 0 else None,
+        'batch_timings': batch_timings,
+    }
@@ -0,0 +1,204 @@
+import json
+import logging
+import os
+import socket
+from contextlib import contextmanager, nullcontext
+from datetime import timedelta
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from .facets import get_facets
+from .ingestion import DEFAULT_BATCH_SIZE, ingest_articles
+from .models import ImportJob
+from .snapshots import import_snapshot
+from .streaming import iter_json_array, iter_xlsx_rows, xlsx_row_count
+
+logger = logging.getLogger(__name__)
+
+# Seconds without a heartbeat after which a running job's worker is presumed dead
+DEFAULT_STALE_AFTER = 600
+
+def enqueue_import(kind, path, **options):
+    """
+    Queue an import of the file at path and return (job, created). If an
+    import of the same file is already queued or running, that job is
+    returned instead with created=False.
+    """
+    return _create_job(kind, path, options)
+
+def _create_job(kind, path, options, **fields):
+    # A running job whose process died still holds the path; free it here
+    # too, so the file can be imported again without a worker running
+    fail_stale_jobs()
+    try:
+        with transaction.atomic():
+            return ImportJob.objects.create(kind=kind, path=path, options=options, **fields), True
+    except IntegrityError:
+        # The partial unique constraint on path: another import is active
+        existing = ImportJob.objects.filter(path=path, status__in=ImportJob.ACTIVE).first()
+        if existing is None:
+            raise
+        return existing, False
+
+def claim_next_job(worker):
+    # Oldest queued job, marked running; skip_locked lets several workers poll at once
+    with transaction.atomic():
+        job = (
+            ImportJob.objects.select_for_update(skip_locked=True)
+            .filter(status=ImportJob.QUEUED)
+            .order_by('id')
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = ImportJob.RUNNING
+        job.worker = worker
+        job.started_at = job.heartbeat_at = timezone.now()
+        job.save(update_fields=['status', 'worker', 'started_at', 'heartbeat_at'])
+    return job
+
+@contextmanager
+def inline_import(kind, path, **options):
+    """
+    Take the same per-file lock as queued imports for an import run in this
+    process, e.g. a ?sync=1 request. Yields (job, created) like
+    enqueue_import: with created=False another import of the file is active
+    and the caller must not import. Otherwise the job is recorded as running
+    and marked done on leaving the block, with the job.stats the block set,
+    or failed if it raised. The import must run with atomic=False and
+    progress=job_progress(job), so its heartbeats commit with each batch
+    and fail_stale_jobs leaves it alone.
+    """
+    now = timezone.now()
+    job, created = _create_job(
+        kind, path, options, status=ImportJob.RUNNING,
+        worker=f'{socket.gethostname()}:{os.getpid()}', started_at=now, heartbeat_at=now,
+    )
+    if not created:
+        yield job, False
+        return
+    try:
+        yield job, True
+    except BaseException as e:
+        job.refresh_from_db()
+        job.status = ImportJob.FAILED
+        job.error = f'{type(e).__name__}: {e}'
+        raise
+    else:
+        stats = job.stats
+        job.refresh_from_db()
+        job.status = ImportJob.DONE
+        job.progress = 1.0
+        if stats:
+            job.stats = {key: value for key, value in stats.items() if key != 'batch_timings'}
+            job.rows_done = job.stats.get('rows_processed', 0)
+    finally:
+        job.finished_at = timezone.now()
+        job.save()
+
+def job_progress(job, fraction=None):
+    """
+    A progress(rows_done, totals) callback for ingest_articles and
+    import_snapshot that records how far the job got and its heartbeat.
+    fraction(rows_done) gives the share done, when the row count is known.
+    """
+    def progress(rows_done, totals):
+        fields = {'rows_done': rows_done, 'stats': totals, 'heartbeat_at': timezone.now()}
+        if fraction is not None:
+            fields['progress'] = min(fraction(rows_done), 1.0)
+        ImportJob.objects.filter(pk=job.pk).update(**fields)
+    return progress
+
+def fail_stale_jobs(stale_after=DEFAULT_STALE_AFTER):
+    # Running jobs whose worker stopped sending heartbeats, so the file can be queued again
+    cutoff = timezone.now() - timedelta(seconds=stale_after)
+    return ImportJob.objects.filter(status=ImportJob.RUNNING, heartbeat_at__lt=cutoff).update(
+        status=ImportJob.FAILED,
+        error=f'No progress for {stale_after} seconds, the worker presumably stopped',
+        finished_at=timezone.now(),
+    )
+
+def snapshot_name(path):
+    # Snapshots of a file are stored under its name, see snapshots.py
+    return os.path.basename(path)
+
+def _open_rows(job, file_obj):
+    # (rows, rows_total, fraction done) for the job's file
+    if job.kind == 'xlsx':
+        total = xlsx_row_count(job.path)
+        return iter_xlsx_rows(job.path), total, None
+    if job.options.get('stream'):
+        # The row count isn't known without parsing the whole file, so
+        # progress is measured by how much of the file has been read
+        size = os.path.getsize(job.path) or 1
+        return iter_json_array(file_obj), None, lambda rows_done: file_obj.tell() / size
+    data = json.load(file_obj)
+    return data, len(data), None
+
+def run_job(job):
+    """
+    Run a claimed job. Every batch commits on its own together with the
+    job's progress, so the status endpoint sees rows_done move as the
+    import goes; re-running a failed import is safe. Returns the job.
+    """
+    batch_size = job.options.get('batch_size', DEFAULT_BATCH_SIZE)
+    try:
+        # Workbooks are opened by openpyxl itself
+        with open(job.path, 'r', encoding='utf-8') if job.kind == 'json' else nullcontext() as file_obj:
+            rows, total, fraction = _open_rows(job, file_obj)
+            if fraction is None:
+                fraction = lambda rows_done: rows_done / total if total else 0.0
+            job.rows_total = total
+            job.save(update_fields=['rows_total'])
+            progress = job_progress(job, fraction)
+
+            if job.options.get('stream'):
+                stats = ingest_articles(rows, batch_size=batch_size, atomic=False, progress=progress)
+            else:
+                # Only the rows that changed since the file's last snapshot are written
+                stats = import_snapshot(
+                    snapshot_name(job.path), rows, batch_size=batch_size,
+                    full=job.options.get('full', False), atomic=False, progress=progress,
+                )
+    except Exception as e:
+        logger.exception('Import job %s failed', job.pk)
+        job.refresh_from_db()
+        job.status = ImportJob.FAILED
+        job.error = f'{type(e).__name__}: {e}'
+    else:
+        stats.pop('batch_timings')
+        # Recount the facets (and admin filter choices) now, not on the next page load
+        get_facets()
+        job.refresh_from_db()
+        job.status = ImportJob.DONE
+        job.rows_done = stats['rows_processed']
+        job.progress = 1.0
+        job.stats = stats
+    job.finished_at = timezone.now()
+    job.save()
+    return job
+
+def job_status(job):
+    # Status payload of the jobs/<id>/ endpoint, with throughput and ETA
+    end = job.finished_at or timezone.now()
+    elapsed = (end - job.started_at).total_seconds() if job.started_at else None
+    rows_per_sec = job.rows_done / elapsed if elapsed else None
+    eta = None
+    if job.status == ImportJob.RUNNING and elapsed and 0 < job.progress < 1:
+        eta = elapsed * (1 - job.progress) / job.progress
+    return {
+        'id': job.id,
+        'kind': job.kind,
+        'path': job.path,
+        'status': job.status,
+        'rows_done': job.rows_done,
+        'rows_total': job.rows_total,
+        'progress': round(job.progress, 4),
+        'rows_per_sec': round(rows_per_sec, 1) if rows_per_sec is not None else None,
+        'elapsed_seconds': round(elapsed, 1) if elapsed is not None else None,
+        'eta_seconds': round(eta, 1) if eta is not None else None,
+        'stats': job.stats,
+        'error': job.error,
+        'created_at': job.created_at,
+        'started_at': job.started_at,
+        'finished_at': job.finished_at,
+    }
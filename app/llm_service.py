@@ -0,0 +1,187 @@
+import asyncio
+import logging
+import weakref
+from django.conf import settings
+from langchain_ollama import ChatOllama
+from LLM import MODEL_PARAMS, TEMPLATES, build_chain, select_template
+from llm_cache import LLMResponseCache, make_cache_key
+from llm_metrics import metrics_callback
+from .metrics import LLM_COALESCING_RATIO, LLM_IN_FLIGHT, LLM_QUEUE_DEPTH, LLM_SERVICE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+class LLMService:
+    """
+    Long-lived research query chains for the web process. One model (and
+    its HTTP client) is shared by a prebuilt chain per entry of LLM.TEMPLATES,
+    and Ollama is asked to keep the model loaded for keep_alive between calls.
+
+    Concurrent requests for the same topic and template are coalesced: the
+    first one starts the model call and the others wait for its result
+    instead of running their own (single-flight). A call is cancelled once
+    every request waiting for it has gone away. At most max_concurrency
+    calls run at once, the rest queue for a slot; timeout covers the queueing
+    and the call together.
+
+    The service is bound to the event loop it's used on, see get_service().
+    """
+
+    def __init__(self, model_params=MODEL_PARAMS, model_class=ChatOllama, max_concurrency=1,
+                 keep_alive='30m', timeout=60.0, cache=None):
+        self.model_params = model_params
+        self.timeout = timeout
+        self.cache = cache
+        self.model = model_class(**model_params, keep_alive=keep_alive, callbacks=[metrics_callback])
+        self.chains = {
+            name: build_chain(template, outputModel, model=self.model)
+            for name, (template, outputModel) in TEMPLATES.items()
+        }
+        # select_template returns one of the TEMPLATES pairs
+        self._names = {pair: name for name, pair in TEMPLATES.items()}
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._in_flight = {}
+        self._waiters = {}
+        self.requests = 0
+        self.coalesced = 0
+        self.cached = 0
+        self.queued = 0
+        self.running = 0
+
+    def warm_up(self):
+        # Have Ollama load the model now rather than on the first request
+        self.model.invoke('ping', options={'num_predict': 1})
+
+    def template_name(self, topic):
+        return self._names[select_template(topic)]
+
+    async def generate(self, topic, template=None):
+        """
+        Return (result, outcome) for topic, with the template picked by topic
+        length unless one of TEMPLATES is named. outcome is 'call' when this
+        request ran the model, 'coalesced' when it shared an identical call
+        already in flight and 'cached' when it came from the response cache.
+        """
+        name = template or self.template_name(topic)
+        template_text, outputModel = TEMPLATES[name]
+        key = make_cache_key(topic, template_text, outputModel, self.model_params)
+
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                self._count('cached')
+                return outputModel.model_validate(cached), 'cached'
+
+        task = self._in_flight.get(key)
+        if task is None:
+            outcome = 'call'
+            # One deadline for the wait for a slot and the model call
+            task = asyncio.ensure_future(asyncio.wait_for(self._call(name, topic, key), self.timeout))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+        else:
+            outcome = 'coalesced'
+        self._count(outcome)
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            # Shielded, so a waiter that disconnects doesn't cancel the call
+            # the other waiters are sharing
+            return await asyncio.shield(task), outcome
+        finally:
+            self._waiters[task] -= 1
+            if not self._waiters[task]:
+                del self._waiters[task]
+                if not task.done():
+                    # Nobody is left to answer: free the slot, and have the
+                    # next request for this key start a call of its own
+                    if self._in_flight.get(key) is task:
+                        del self._in_flight[key]
+                    task.cancel()
+
+    async def _call(self, name, topic, key):
+        self.queued += 1
+        LLM_QUEUE_DEPTH.inc()
+        try:
+            await self._slots.acquire()
+        finally:
+            self.queued -= 1
+            LLM_QUEUE_DEPTH.dec()
+        self.running += 1
+        LLM_IN_FLIGHT.inc()
+        try:
+            result = await self.chains[name].ainvoke({'topic': topic})
+        finally:
+            self.running -= 1
+            LLM_IN_FLIGHT.dec()
+            self._slots.release()
+        if self.cache is not None:
+            self.cache.set(key, result.model_dump())
+        return result
+
+    def _finished(self, key, task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # Mark a failure as seen even if every waiter already gave up on it
+        if not task.cancelled():
+            task.exception()
+
+    def _count(self, outcome):
+        self.requests += 1
+        if outcome == 'coalesced':
+            self.coalesced += 1
+        elif outcome == 'cached':
+            self.cached += 1
+        LLM_SERVICE_REQUESTS.inc(outcome=outcome)
+        LLM_COALESCING_RATIO.set(round(self.coalesced / self.requests, 4))
+
+    def stats(self):
+        return {
+            'requests': self.requests,
+            'coalesced': self.coalesced,
+            'cached': self.cached,
+            'coalescing_ratio': round(self.coalesced / self.requests, 4) if self.requests else 0.0,
+            'queue_depth': self.queued,
+            'in_flight': self.running,
+            'model': self.model_params.get('model'),
+            'templates': list(self.chains),
+            'cache': self.cache.stats() if self.cache is not None else None,
+        }
+
+def build_service():
+    return LLMService(
+        max_concurrency=settings.LLM_MAX_CONCURRENCY,
+        keep_alive=settings.LLM_KEEP_ALIVE,
+        timeout=settings.LLM_TIMEOUT,
+        cache=LLMResponseCache(settings.LLM_CACHE_PATH) if settings.LLM_CACHE_PATH else None,
+    )
+
+# One service per event loop: coalescing relies on asyncio futures and the
+# model's async HTTP client, neither of which can move between loops. Under
+# ASGI a process runs a single loop, so this is one warm service per process;
+# an async view under WSGI gets a fresh loop (and service) per request.
+_services = weakref.WeakKeyDictionary()
+_preloaded = None
+
+def preload():
+    """
+    Build the chains and load the model before the first request; called
+    from project/asgi.py when LLM_PRELOAD is set. The service is handed to
+    the first event loop that asks for one.
+    """
+    global _preloaded
+    if _preloaded is not None or _services:
+        return
+    _preloaded = build_service()
+    try:
+        _preloaded.warm_up()
+    except Exception:
+        # Ollama may not be up yet; the first request loads the model instead
+        logger.exception('Could not warm up %s', MODEL_PARAMS.get('model'))
+
+def get_service():
+    global _preloaded
+    loop = asyncio.get_running_loop()
+    service = _services.get(loop)
+    if service is None:
+        service = _services[loop] = _preloaded or build_service()
+        _preloaded = None
+    return service
@@ -0,0 +1,71 @@
+import asyncio
+import json
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.utils.json import parse_partial_json
+from langchain_ollama import ChatOllama
+from LLM import MODEL_PARAMS, select_template
+from llm_metrics import metrics_callback
+
+def sse_event(event, data):
+    # One server-sent event with a JSON payload
+    return f'event: {event}\ndata: {json.dumps(data)}\n\n'
+
+def parse_partial(text):
+    # Best-effort parse of the JSON generated so far, None while it's unreadable
+    try:
+        partial = parse_partial_json(text)
+    except ValueError:
+        return None
+    return partial if isinstance(partial, dict) else None
+
+async def stream_refinement(topic, model_params=MODEL_PARAMS, timeout=60.0):
+    """
+    Run the research query chain for topic and yield server-sent events as
+    the model generates: "start" straight away, a "token" for every chunk of
+    text, a "partial" whenever more of the structured output can be parsed,
+    then "result" with the validated output (or "error").
+    """
+    template, outputModel = select_template(topic)
+    yield sse_event('start', {'topic': topic, 'output_model': outputModel.__name__})
+
+    prompt = ChatPromptTemplate.from_template(template)
+    # Same JSON schema constraint as with_structured_output(method="json_schema"),
+    # but the raw tokens are streamed instead of waiting for the parsed object
+    model = ChatOllama(**model_params, format=outputModel.model_json_schema(), callbacks=[metrics_callback])
+    chain = prompt | model
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    stream = chain.astream({"topic": topic}).__aiter__()
+    text = ''
+    last_partial = None
+
+    try:
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise asyncio.TimeoutError
+            try:
+                chunk = await asyncio.wait_for(stream.__anext__(), remaining)
+            except StopAsyncIteration:
+                break
+
+            token = chunk.content if isinstance(chunk.content, str) else ''
+            if not token:
+                continue
+            text += token
+            yield sse_event('token', {'text': token})
+
+            partial = parse_partial(text)
+            if partial is not None and partial != last_partial:
+                last_partial = partial
+                yield sse_event('partial', partial)
+
+        result = outputModel.model_validate_json(text)
+        yield sse_event('result', result.model_dump())
+    except asyncio.TimeoutError:
+        yield sse_event('error', {'error': f'Timed out after {timeout}s'})
+    except Exception as e:
+        yield sse_event('error', {'error': f'{type(e).__name__}: {e}'})
+    finally:
+        await stream.aclose()
@@ -0,0 +1,147 @@
+import asyncio
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from itertools import cycle
+from django.conf import settings
+
+# Requests sent to each read endpoint, cycled in order so every run (and
+# every configuration) sends the same mix
+ENDPOINTS = {
+    'list': ('articles/', [
+        {'limit': '50'},
+        {'source': 'PubMed', 'limit': '50'},
+        {'theme': 'Screening', 'fields': 'id,title,source'},
+        {'type': 'Grey', 'final_level_1_consensus': 'Include'},
+    ]),
+    'search': ('articles/search/', [
+        {'q': 'prostate screening'},
+        {'q': 'active surveillance', 'limit': '20'},
+        {'q': 'biopsy AND (mortality OR outcomes)', 'syntax': 'boolean'},
+    ]),
+    'similar': ('articles/similar/', [
+        {'q': 'prostate cancer screening guidelines'},
+        {'q': 'magnetic resonance imaging biopsy', 'k': '20'},
+    ]),
+    'facets': ('articles/facets/', [{}]),
+}
+# URL prefix of each flavour of the read endpoints
+MODES = {'sync': '', 'async': 'async/'}
+
+# Commands that serve the project, {placeholders} filled from the options
+SERVERS = {
+    'wsgi': ['gunicorn', 'project.wsgi:application', '--bind', '{host}:{port}',
+             '--workers', '{workers}', '--threads', '{threads}'],
+    'asgi': ['uvicorn', 'project.asgi:application', '--host', '{host}', '--port', '{port}',
+             '--workers', '{workers}', '--no-access-log'],
+    # Django's threaded development server, for a quick run without either installed
+    'runserver': [sys.executable, 'manage.py', 'runserver', '{host}:{port}', '--noreload'],
+}
+
+async def run_load(base_url, path, requests, concurrency, duration, warmup=0.0):
+    """
+    Send requests to base_url + path from `concurrency` clients, each
+    sending its next request as soon as the previous one is answered, for
+    warmup + duration seconds. Only responses that arrive after the warmup
+    are counted. Returns throughput and latency percentiles.
+    """
+    import httpx
+
+    latencies = []
+    errors = 0
+    params = cycle(requests)
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    measure_from = started + warmup
+    deadline = measure_from + duration
+
+    async def client(http):
+        nonlocal errors
+        while loop.time() < deadline:
+            request_started = time.perf_counter()
+            try:
+                response = await http.get(path, params=next(params))
+                failed = response.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+            if loop.time() >= measure_from:
+                latencies.append(time.perf_counter() - request_started)
+                errors += failed
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as http:
+        await asyncio.gather(*(client(http) for _ in range(concurrency)))
+
+    elapsed = loop.time() - measure_from
+    result = {
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': round(len(latencies) / elapsed, 1) if elapsed > 0 else None,
+    }
+    if len(latencies) >= 2:
+        quantiles = statistics.quantiles(latencies, n=100)
+        result.update({
+            'p50_ms': round(quantiles[49] * 1000, 1),
+            'p95_ms': round(quantiles[94] * 1000, 1),
+            'p99_ms': round(quantiles[98] * 1000, 1),
+            'max_ms': round(max(latencies) * 1000, 1),
+        })
+    return result
+
+def wait_until_ready(base_url, process, timeout=60.0):
+    import httpx
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'Server exited with code {process.returncode}')
+        try:
+            httpx.get(f'{base_url}metrics/', timeout=2.0)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f'Server did not answer within {timeout}s')
+
+@contextmanager
+def serve(server, env, host='127.0.0.1', port=8765, workers=1, threads=8):
+    """
+    Run the project under one of SERVERS with extra environment variables
+    (e.g. DB_CONN_MAX_AGE) and yield its base URL, stopping it afterwards.
+    """
+    command = [
+        part.format(host=host, port=port, workers=workers, threads=threads)
+        for part in SERVERS[server]
+    ]
+    if shutil.which(command[0]) is None:
+        raise RuntimeError(f'{command[0]} is not installed, it is needed to run the {server} server')
+    process = subprocess.Popen(
+        command,
+        cwd=settings.BASE_DIR,
+        env={**os.environ, **env},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    base_url = f'http://{host}:{port}/'
+    try:
+        wait_until_ready(base_url, process)
+        yield base_url
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+def pooling_env(pooled, conn_max_age, pooler_url=None):
+    # Settings overrides for the unpooled (a connection per request) and pooled modes
+    if not pooled:
+        return {'DB_CONN_MAX_AGE': '0'}
+    env = {'DB_CONN_MAX_AGE': str(conn_max_age), 'DB_CONN_HEALTH_CHECKS': 'true'}
+    if pooler_url:
+        env.update({'DATABASE_URL': pooler_url, 'DB_DISABLE_SERVER_SIDE_CURSORS': 'true'})
+    return env
@@ -0,0 +1,111 @@
+import statistics
+import time
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import RequestFactory
+from app.admin import ArticleAdmin
+from app.facets import invalidate_facets
+from app.ingestion import build_article
+from app.models import Article
+from app.synthetic import synthetic_rows
+
+# Changelist loads measured at every table size: (label, query string)
+SCENARIOS = [
+    ('first page', {}),
+    ('page 20', {'p': '20'}),
+    ('filter source', {'source': 'PubMed'}),
+    ('filter source + theme', {'source': 'PubMed', 'theme': 'Screening'}),
+    ('search "prostate screening"', {'q': 'prostate screening'}),
+    ('search prefix "overdiag"', {'q': 'overdiag'}),
+]
+
+class DefaultArticleAdmin(admin.ModelAdmin):
+    # The changelist as Django builds it by default, for comparison
+    list_display = ArticleAdmin.list_display
+    list_filter = ('source', 'type', 'theme', 'research_paper_type')
+    # The search fields ArticleAdmin had before its search used the index
+    search_fields = ('title', 'source', 'theme', 'country_organisation')
+    ordering = ArticleAdmin.ordering
+
+class Command(BaseCommand):
+    help = (
+        'Grow a synthetic Article table through each --sizes step and report the '
+        'admin changelist latency of ArticleAdmin next to a default ModelAdmin '
+        '(exact counts, SELECT DISTINCT filters, icontains search). Everything, '
+        'including the seeded rows, is rolled back at the end.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='10000,100000,1000000', help='Comma separated table sizes')
+        parser.add_argument('--repeat', type=int, default=5, help='Loads per scenario; the median is reported')
+        parser.add_argument('--skip-default', action='store_true', help="Don't time the default ModelAdmin")
+
+    def handle(self, *args, **options):
+        sizes = sorted(int(size) for size in options['sizes'].split(','))
+        admins = {'ArticleAdmin': ArticleAdmin(Article, admin.site)}
+        if not options['skip_default']:
+            admins['default'] = DefaultArticleAdmin(Article, admin.site)
+
+        with transaction.atomic():
+            user = get_user_model()(username='bench-admin', is_staff=True, is_superuser=True)
+            user.save()
+            results = {}
+            seeded = Article.objects.count()
+            for size in sizes:
+                if size > seeded:
+                    self.seed(seeded, size - seeded)
+                    seeded = size
+                # An import invalidates the cached filter choices, so the first
+                # load after it pays for recounting them
+                invalidate_facets()
+                started = time.perf_counter()
+                self.load(admins['ArticleAdmin'], user, {})
+                self.stdout.write(f'{size} rows: first ArticleAdmin load after import {self.ms(started):.1f} ms')
+                for name, model_admin in admins.items():
+                    for label, params in SCENARIOS:
+                        timings = []
+                        for _ in range(options['repeat']):
+                            started = time.perf_counter()
+                            self.load(model_admin, user, params)
+                            timings.append(self.ms(started))
+                        results[size, name, label] = statistics.median(timings)
+
+            self.report(sizes, admins, results)
+            transaction.set_rollback(True)
+
+    def seed(self, start, rows):
+        started = time.perf_counter()
+        batch = []
+        # A seed per step so the URLs (and fingerprints) of each step are distinct
+        for row in synthetic_rows(rows, seed=f'bench-admin-{start}'):
+            batch.append(build_article(row))
+            if len(batch) >= 5000:
+                Article.objects.bulk_create(batch)
+                batch = []
+        Article.objects.bulk_create(batch)
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {connection.ops.quote_name(Article._meta.db_table)}')
+        self.stdout.write(f'Seeded {rows} articles in {time.perf_counter() - started:.1f}s')
+
+    def load(self, model_admin, user, params):
+        request = RequestFactory().get('/admin/app/article/', params)
+        request.user = user
+        response = model_admin.changelist_view(request)
+        if response.status_code != 200:
+            raise RuntimeError(f'Changelist {params} returned {response.status_code}')
+        response.render()
+
+    def ms(self, started):
+        return (time.perf_counter() - started) * 1000
+
+    def report(self, sizes, admins, results):
+        self.stdout.write('')
+        header = f'{"changelist (median ms)":<44}' + ''.join(f'{size:>12}' for size in sizes)
+        for name in admins:
+            self.stdout.write(f'{name}\n{header}')
+            for label, _ in SCENARIOS:
+                timings = ''.join(f'{results[size, name, label]:>12.1f}' for size in sizes)
+                self.stdout.write(f'{label:<44}{timings}')
+            self.stdout.write('')
@@ -0,0 +1,109 @@
+import statistics
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.http import QueryDict
+from app.ingestion import build_article
+from app.models import Article
+from app.queries import filter_articles, keyset_page
+from app.synthetic import synthetic_rows
+
+# Filter combinations used by the admin list_filter and the list API
+FILTER_COMBINATIONS = [
+    {},
+    {'source': 'PubMed'},
+    {'type': 'Grey'},
+    {'theme': 'Screening'},
+    {'research_paper_type': 'Review'},
+    {'final_level_1_consensus': 'Include'},
+    {'final_level_2_consensus': 'Include'},
+    {'source': 'PubMed', 'type': 'Grey'},
+    {'theme': 'Screening', 'research_paper_type': 'Review'},
+    {'final_level_1_consensus': 'Include', 'final_level_2_consensus': 'Exclude'},
+]
+
+class Command(BaseCommand):
+    help = (
+        'Seed N synthetic articles and report list query latency for each filter '
+        'combination with and without the Article indexes. Everything, including '
+        'the seeded rows, is rolled back at the end. On PostgreSQL the run without '
+        'indexes only turns index scans off for its own transaction, so no lock is '
+        'taken on the table.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100000, help='Number of synthetic articles to seed')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per query; the median is reported')
+        parser.add_argument('--page-size', type=int, default=50)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.seed(options['rows'])
+
+            with_indexes = self.measure(options['repeat'], options['page_size'])
+            self.disable_indexes()
+            without_indexes = self.measure(options['repeat'], options['page_size'])
+
+            self.stdout.write(
+                f'{"filter (median ms)":<66} {"page":>8} {"page idx":>9} {"count":>8} {"count idx":>9}'
+            )
+            for label, (page, count) in without_indexes.items():
+                page_indexed, count_indexed = with_indexes[label]
+                self.stdout.write(
+                    f'{label:<66} {page:>8.2f} {page_indexed:>9.2f} {count:>8.2f} {count_indexed:>9.2f}'
+                )
+
+            transaction.set_rollback(True)
+
+    def seed(self, rows):
+        started = time.perf_counter()
+        batch = []
+        # Seeded URLs carry a distinct prefix so their fingerprints never clash with real rows
+        for row in synthetic_rows(rows, seed='bench'):
+            batch.append(build_article(row))
+            if len(batch) >= 5000:
+                Article.objects.bulk_create(batch)
+                batch = []
+        Article.objects.bulk_create(batch)
+        self.analyze()
+        self.stdout.write(f'Seeded {rows} articles in {time.perf_counter() - started:.1f}s')
+
+    def analyze(self):
+        # Refresh planner statistics so the timings reflect the current table
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {connection.ops.quote_name(Article._meta.db_table)}')
+
+    def disable_indexes(self):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                # DROP INDEX would hold an ACCESS EXCLUSIVE lock on the table
+                # until the rollback, blocking every other session. The planner
+                # settings end with the transaction instead
+                for setting in ('enable_indexscan', 'enable_indexonlyscan', 'enable_bitmapscan'):
+                    cursor.execute(f'SET LOCAL {setting} = off')
+                return
+            # SQLite has no such settings; a DROP INDEX inside the transaction
+            # is rolled back with it and only locks the local database file
+            for index in Article._meta.indexes:
+                cursor.execute(f'DROP INDEX {connection.ops.quote_name(index.name)}')
+        self.analyze()
+
+    def measure(self, repeat, page_size):
+        results = {}
+        for filters in FILTER_COMBINATIONS:
+            params = QueryDict(mutable=True)
+            params.update(filters)
+            queryset = filter_articles(Article.objects.all(), params)
+            label = ', '.join(f'{key}={value}' for key, value in filters.items()) or '(no filter)'
+            page = self.median_ms(lambda: keyset_page(queryset, ['id', 'title'], page_size), repeat)
+            count = self.median_ms(lambda: queryset.count(), repeat)
+            results[label] = (page, count)
+        return results
+
+    def median_ms(self, func, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
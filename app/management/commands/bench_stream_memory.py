@@ -0,0 +1,88 @@
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from app.ingestion import DEFAULT_BATCH_SIZE, build_article, ingest_articles, iter_batches
+from app.streaming import iter_json_array
+from app.synthetic import synthetic_rows
+
+def peak_rss_mb():
+    # ru_maxrss is reported in kilobytes on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        peak /= 1024
+    return round(peak / 1024, 1)
+
+class Command(BaseCommand):
+    help = (
+        'Compare peak RSS of json.load vs. streaming ingestion as the input grows. '
+        'Each measurement runs in a fresh subprocess.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[10000, 50000, 200000],
+                            help='Synthetic file sizes (number of articles) to measure')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--write', action='store_true',
+                            help='Run the real ingestion (rolled back afterwards) instead of only building Articles')
+        # Internal: measure one file in this process and print the result as JSON
+        parser.add_argument('--child', nargs=2, metavar=('MODE', 'PATH'), help='(internal)')
+
+    def handle(self, *args, **options):
+        if options['child']:
+            mode, path = options['child']
+            self.measure(mode, path, options['batch_size'], options['write'])
+            return
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            self.stdout.write(f'{"rows":>10} {"file MB":>9} {"mode":>7} {"seconds":>8} {"peak RSS MB":>12}')
+            for rows in options['rows']:
+                path = os.path.join(tmp_dir, f'articles_{rows}.json')
+                self.write_file(path, rows)
+                size_mb = os.path.getsize(path) / 1024 / 1024
+
+                for mode in ('load', 'stream'):
+                    command = [
+                        sys.executable, sys.argv[0], 'bench_stream_memory',
+                        '--child', mode, path, '--batch-size', str(options['batch_size']),
+                    ]
+                    if options['write']:
+                        command.append('--write')
+                    output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+                    result = json.loads(output.strip().splitlines()[-1])
+                    self.stdout.write(
+                        f'{rows:>10} {size_mb:>9.1f} {mode:>7} {result["seconds"]:>8.2f} {result["peak_rss_mb"]:>12.1f}'
+                    )
+
+    def write_file(self, path, rows):
+        # Write the synthetic export row by row so generating it stays cheap too
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('[\n')
+            for i, row in enumerate(synthetic_rows(rows)):
+                if i:
+                    f.write(',\n')
+                f.write(json.dumps(row, indent=4))
+            f.write('\n]')
+
+    def measure(self, mode, path, batch_size, write):
+        started = time.perf_counter()
+        with open(path, 'r', encoding='utf-8') as json_file:
+            data = iter_json_array(json_file) if mode == 'stream' else json.load(json_file)
+            if write:
+                with transaction.atomic():
+                    ingest_articles(data, batch_size=batch_size)
+                    transaction.set_rollback(True)
+            else:
+                for batch in iter_batches(data, batch_size):
+                    [build_article(row) for row in batch]
+
+        self.stdout.write(json.dumps({
+            'mode': mode,
+            'seconds': time.perf_counter() - started,
+            'peak_rss_mb': peak_rss_mb(),
+        }))
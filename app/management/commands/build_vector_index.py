@@ -0,0 +1,27 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from app.models import Article
+from app.vectors import get_index, np
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild the title vector index used by articles/similar/ from every Article. '
+        'Imports keep it up to date incrementally; run this after changing VECTOR_DIM '
+        'or when the index directory was lost.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        if np is None:
+            raise CommandError('numpy is required for the vector index')
+        index = get_index()
+
+        started = time.perf_counter()
+        articles = Article.objects.order_by('id').values_list('id', 'title')
+        # Imports that finish meanwhile wait for the lock and then catch up
+        with index.locked(rebuild=True):
+            count = index.add(articles.iterator(chunk_size=options['chunk_size']))
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f'Indexed {count} articles in {elapsed:.1f}s ({index.index_dir})')
@@ -0,0 +1,142 @@
+import asyncio
+import json
+import time
+from django.core.management.base import BaseCommand, CommandError
+from app.models import Article
+from app.search import boolean_search
+
+# Every retrieved article whose Level 2 decision isn't 'Include' counts as
+# excluded; a blank Level 2 means it was already excluded at Level 1
+INCLUDED = 'Include'
+
+def query_from_result(result):
+    # The refined query, or for the short template its subtopics OR'ed together
+    refined = getattr(result, 'refined_query', None)
+    if refined:
+        return refined
+    return ' OR '.join(getattr(result, 'suggested_subtopics', None) or [])
+
+def retrieve(query, limit):
+    # (id, Level 2 decision) of the top matches for a generated query
+    return list(
+        boolean_search(Article.objects.all(), query)
+        .values_list('id', 'final_level_2_consensus')[:limit]
+    )
+
+class Command(BaseCommand):
+    help = (
+        'Run every prompt template in prompts.py over a set of topics and score '
+        'the generated queries by how many Level 2 included vs. excluded articles '
+        'they retrieve. Model calls go through the LLM response cache.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--topics', help='JSONL topic file (default: every distinct Article theme)')
+        parser.add_argument('--templates', nargs='+', help='Templates to evaluate (default: all)')
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument('--timeout', type=float, default=120.0)
+        parser.add_argument('--limit', type=int, default=200, help='Articles retrieved per query')
+        parser.add_argument('--no-cache', action='store_true')
+        parser.add_argument('--fake', action='store_true', help='Use fake_ollama.FakeChatOllama instead of Ollama')
+        parser.add_argument('--fake-latency', type=float, default=0.2)
+        parser.add_argument('--json', help='Also write per-call results to this JSON file')
+
+    def handle(self, *args, **options):
+        # LLM code lives at the project root and pulls in langchain, so import it only here
+        from LLM import MODEL_PARAMS, TEMPLATES
+        from llm_batch import read_topics
+        from llm_cache import LLMResponseCache
+
+        templates = options['templates'] or list(TEMPLATES)
+        unknown = [name for name in templates if name not in TEMPLATES]
+        if unknown:
+            raise CommandError(f'Unknown templates: {", ".join(unknown)}')
+
+        if options['topics']:
+            topics = list(dict.fromkeys(read_topics(options['topics'])))
+        else:
+            topics = list(Article.objects.exclude(theme='').order_by('theme').values_list('theme', flat=True).distinct())
+        if not topics:
+            raise CommandError('No topics to evaluate')
+
+        model_params = dict(MODEL_PARAMS)
+        model_class = None
+        if options['fake']:
+            from fake_ollama import FakeChatOllama
+            model_class = FakeChatOllama
+            model_params['latency'] = options['fake_latency']
+
+        cache = None if options['no_cache'] else LLMResponseCache()
+        try:
+            calls = asyncio.run(self.generate_all(
+                templates, topics, TEMPLATES, cache, model_params, model_class, options
+            ))
+        finally:
+            if cache is not None:
+                self.stdout.write(f'Cache: {cache.stats()}')
+                cache.close()
+
+        # Scoring uses the ORM, so it runs after the event loop has finished
+        self.score(calls, options['limit'])
+        self.report(templates, calls)
+        if options['json']:
+            with open(options['json'], 'w', encoding='utf-8') as f:
+                json.dump(calls, f, indent=2)
+
+    async def generate_all(self, templates, topics, registry, cache, model_params, model_class, options):
+        from LLM import generate_with_template
+
+        extra = {'model_class': model_class} if model_class else {}
+        semaphore = asyncio.Semaphore(max(1, options['concurrency']))
+
+        async def one(name, topic):
+            template, output_model = registry[name]
+            call = {'template': name, 'topic': topic}
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    result = await generate_with_template(
+                        topic, template, output_model, cache, model_params, options['timeout'], **extra
+                    )
+                    call['query'] = query_from_result(result)
+                except Exception as e:
+                    call['error'] = f'{type(e).__name__}: {e}'
+                call['latency'] = time.perf_counter() - started
+            return call
+
+        return await asyncio.gather(*(one(name, topic) for name in templates for topic in topics))
+
+    def score(self, calls, limit):
+        # Generated queries use boolean syntax, so they go through the query compiler
+        for call in calls:
+            if not call.get('query'):
+                continue
+            rows = retrieve(call['query'], limit)
+            call['retrieved'] = len(rows)
+            call['included_ids'] = [pk for pk, decision in rows if decision == INCLUDED]
+            call['excluded'] = sum(1 for _, decision in rows if decision != INCLUDED)
+
+    def report(self, templates, calls):
+        from llm_batch import percentile
+
+        total_included = Article.objects.filter(final_level_2_consensus=INCLUDED).count()
+        self.stdout.write(
+            f'{"template":<8} {"calls":>6} {"errors":>6} {"p50 ms":>9} {"p95 ms":>9} '
+            f'{"retrieved":>9} {"precision":>9} {"recall":>7}'
+        )
+        for name in templates:
+            rows = [call for call in calls if call['template'] == name]
+            scored = [call for call in rows if 'retrieved' in call]
+            latencies = [call['latency'] * 1000 for call in rows if 'error' not in call]
+            included = sum(len(call['included_ids']) for call in scored)
+            excluded = sum(call['excluded'] for call in scored)
+            # Recall counts each included article once, however many topics found it
+            found = set(pk for call in scored for pk in call['included_ids'])
+            precision = included / (included + excluded) if included + excluded else 0.0
+            recall = len(found) / total_included if total_included else 0.0
+            p50 = percentile(latencies, 50) or 0.0
+            p95 = percentile(latencies, 95) or 0.0
+            self.stdout.write(
+                f'{name:<8} {len(rows):>6} {len(rows) - len(latencies):>6} {p50:>9.1f} {p95:>9.1f} '
+                f'{sum(call["retrieved"] for call in scored):>9} {precision:>9.3f} {recall:>7.3f}'
+            )
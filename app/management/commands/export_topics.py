@@ -0,0 +1,26 @@
+import json
+from django.core.management.base import BaseCommand
+from app.models import Article
+
+class Command(BaseCommand):
+    help = 'Write every distinct Article theme as a JSONL topic file for llm_batch.py.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='Path of the JSONL file to write')
+        parser.add_argument('--field', default='theme', choices=['theme', 'research_paper_type', 'title'],
+                            help='Article field whose distinct values become topics')
+
+    def handle(self, *args, **options):
+        field = options['field']
+        topics = (
+            Article.objects.exclude(**{field: ''})
+            .order_by(field)
+            .values_list(field, flat=True)
+            .distinct()
+        )
+        count = 0
+        with open(options['output'], 'w', encoding='utf-8') as f:
+            for topic in topics.iterator():
+                f.write(json.dumps({'topic': topic}) + '\n')
+                count += 1
+        self.stdout.write(f'Wrote {count} topics to {options["output"]}')
@@ -0,0 +1,80 @@
+import json
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from app.dedup import duplicate_clusters, flag_duplicates
+from app.ingestion import ARTICLE_FIELDS
+from app.models import Article, TitleBucket
+from app.signals import articles_changed
+
+class Command(BaseCommand):
+    help = (
+        'Report clusters of near-duplicate Articles (same normalized URL or MinHash-similar '
+        'titles). --rescan recomputes the title buckets and flags for the whole table, e.g. '
+        'after upgrading; --merge fills blank fields of each canonical article from its '
+        'copies and deletes the copies.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rescan', action='store_true', help='Rebuild buckets and flags for every article')
+        parser.add_argument('--merge', action='store_true', help='Merge and delete flagged duplicates')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument('--show', type=int, default=20, help='Clusters printed (largest first)')
+        parser.add_argument('--json', help='Write every cluster to this JSON file')
+
+    def handle(self, *args, **options):
+        if options['rescan']:
+            self.rescan(options['chunk_size'])
+
+        clusters = duplicate_clusters()
+        copies = sum(len(cluster['duplicates']) for cluster in clusters)
+        self.stdout.write(f'{len(clusters)} clusters, {copies} duplicate articles')
+        for cluster in clusters[:options['show']]:
+            article = cluster['article']
+            self.stdout.write(f'\n#{article["id"]} [{article["source"]}] {article["title"][:100]}')
+            for row in cluster['duplicates']:
+                self.stdout.write(f'  = #{row["id"]} [{row["source"]}] {row["title"][:100]}')
+        if options['json']:
+            with open(options['json'], 'w', encoding='utf-8') as f:
+                json.dump(clusters, f, indent=2)
+
+        if options['merge']:
+            self.merge(clusters)
+
+    def rescan(self, chunk_size):
+        # Articles are flagged in id order, so every chunk is compared with the
+        # buckets of all earlier chunks, as if the table was imported again
+        started = time.perf_counter()
+        flagged = 0
+        with transaction.atomic():
+            TitleBucket.objects.all().delete()
+            Article.objects.filter(duplicate_of__isnull=False).update(duplicate_of=None)
+            articles = Article.objects.order_by('id').only('id', 'title', 'url_key', 'duplicate_of')
+            chunk = []
+            for article in articles.iterator(chunk_size=chunk_size):
+                chunk.append(article)
+                if len(chunk) >= chunk_size:
+                    flagged += flag_duplicates(chunk)
+                    chunk = []
+            if chunk:
+                flagged += flag_duplicates(chunk)
+            transaction.on_commit(articles_changed)
+        self.stdout.write(f'Rescanned in {time.perf_counter() - started:.1f}s, {flagged} duplicates flagged')
+
+    def merge(self, clusters):
+        merged = 0
+        with transaction.atomic():
+            for cluster in clusters:
+                ids = [row['id'] for row in cluster['duplicates']]
+                article = Article.objects.get(pk=cluster['article']['id'])
+                # Blank fields of the canonical article are filled from its copies, oldest first
+                for copy in Article.objects.filter(id__in=ids).order_by('id'):
+                    for field in ARTICLE_FIELDS:
+                        if getattr(article, field) in ('', None) and getattr(copy, field) not in ('', None):
+                            setattr(article, field, getattr(copy, field))
+                Article.objects.filter(pk=article.pk).update(
+                    **{field: getattr(article, field) for field in ARTICLE_FIELDS}
+                )
+                merged += Article.objects.filter(id__in=ids).delete()[1].get('app.Article', 0)
+            transaction.on_commit(articles_changed)
+        self.stdout.write(f'Merged and deleted {merged} duplicate articles')
@@ -0,0 +1,102 @@
+import asyncio
+import json
+from contextlib import nullcontext
+from django.core.management.base import BaseCommand, CommandError
+from app.ingestion import ingest_articles
+from app.loadtest import ENDPOINTS, MODES, SERVERS, pooling_env, run_load, serve
+from app.models import Article
+from app.synthetic import synthetic_rows
+
+def split(value):
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+class Command(BaseCommand):
+    help = (
+        'Load test the article read endpoints and report requests/sec and latency '
+        'percentiles for sync vs async views, per server (WSGI via gunicorn, ASGI '
+        'via uvicorn) and with or without connection reuse. Servers are started '
+        'with the current settings, so point DATABASE_URL at SQLite or a local '
+        'PostgreSQL; --url tests a server that is already running instead.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help='Base URL of a running server; no servers are started')
+        parser.add_argument('--servers', default='wsgi,asgi', help=f'Servers to start: {", ".join(SERVERS)}')
+        parser.add_argument('--pooling', default='off,on', help='Connection modes: off (a connection per request), on')
+        parser.add_argument('--conn-max-age', type=int, default=60, help='DB_CONN_MAX_AGE of the pooled mode')
+        parser.add_argument('--pooler-url', help='DATABASE_URL of a PgBouncer to use in the pooled mode')
+        parser.add_argument('--workers', type=int, default=2)
+        parser.add_argument('--threads', type=int, default=8, help='Threads per WSGI worker')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--modes', default='sync,async', help='View flavours: sync, async')
+        parser.add_argument('--endpoints', default=','.join(ENDPOINTS))
+        parser.add_argument('--concurrency', default='1,8,32', help='Concurrent clients, comma separated')
+        parser.add_argument('--duration', type=float, default=10.0, help='Measured seconds per run')
+        parser.add_argument('--warmup', type=float, default=2.0, help='Unmeasured seconds before each run')
+        parser.add_argument('--seed-rows', type=int, default=0,
+                            help='Import this many synthetic articles first (idempotent)')
+        parser.add_argument('--json', help='Also write the results to this JSON file')
+
+    def handle(self, *args, **options):
+        modes = split(options['modes'])
+        endpoints = split(options['endpoints'])
+        concurrency = [int(value) for value in split(options['concurrency'])]
+        for name, known in ((modes, MODES), (endpoints, ENDPOINTS)):
+            unknown = set(name) - set(known)
+            if unknown:
+                raise CommandError(f'Unknown: {", ".join(sorted(unknown))}')
+
+        if options['seed_rows']:
+            # A fixed seed, so re-running leaves the table as it was
+            stats = ingest_articles(synthetic_rows(options['seed_rows'], seed='load-test'), batch_size=2000)
+            self.stdout.write(f'Seeded: {stats["articles_created"]} created, {Article.objects.count()} articles')
+
+        if options['url']:
+            configurations = [('external', '-', nullcontext(options['url'].rstrip('/') + '/'))]
+        else:
+            configurations = []
+            for server in split(options['servers']):
+                if server not in SERVERS:
+                    raise CommandError(f'Unknown server: {server}')
+                for pooling in split(options['pooling']):
+                    env = pooling_env(pooling == 'on', options['conn_max_age'], options['pooler_url'])
+                    context = serve(server, env, port=options['port'],
+                                    workers=options['workers'], threads=options['threads'])
+                    configurations.append((server, pooling, context))
+
+        results = []
+        self.stdout.write(
+            f'{"server":<10} {"pool":<5} {"mode":<6} {"endpoint":<8} {"clients":>7} '
+            f'{"req/s":>8} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"errors":>6}'
+        )
+        for server, pooling, context in configurations:
+            try:
+                with context as base_url:
+                    for mode in modes:
+                        for endpoint in endpoints:
+                            path, requests = ENDPOINTS[endpoint]
+                            for clients in concurrency:
+                                result = asyncio.run(run_load(
+                                    base_url, MODES[mode] + path, requests, clients,
+                                    options['duration'], options['warmup'],
+                                ))
+                                row = {'server': server, 'pooling': pooling, 'mode': mode,
+                                       'endpoint': endpoint, 'concurrency': clients, **result}
+                                results.append(row)
+                                self.write_row(row)
+            except RuntimeError as e:
+                raise CommandError(str(e))
+
+        if options['json']:
+            with open(options['json'], 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2)
+
+    def write_row(self, row):
+        def value(key):
+            return '-' if row.get(key) is None else row[key]
+
+        self.stdout.write(
+            f'{row["server"]:<10} {row["pooling"]:<5} {row["mode"]:<6} {row["endpoint"]:<8} '
+            f'{row["concurrency"]:>7} {value("rps"):>8} {value("p50_ms"):>8} {value("p95_ms"):>8} '
+            f'{value("p99_ms"):>8} {row["errors"]:>6}'
+        )
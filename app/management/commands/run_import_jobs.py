@@ -0,0 +1,50 @@
+import os
+import socket
+import time
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from app.jobs import DEFAULT_STALE_AFTER, claim_next_job, fail_stale_jobs, run_job
+from app.models import ImportJob
+
+class Command(BaseCommand):
+    help = (
+        'Worker for the import job queue: claims queued ImportJobs one at a time and '
+        'runs them. Several workers can run side by side.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is empty')
+        parser.add_argument('--poll-interval', type=float, default=2.0, help='Seconds between polls of an empty queue')
+        parser.add_argument('--stale-after', type=int, default=DEFAULT_STALE_AFTER,
+                            help='Fail running jobs with no progress for this many seconds')
+
+    def handle(self, *args, **options):
+        worker = f'{socket.gethostname()}:{os.getpid()}'
+        self.stdout.write(f'Import worker {worker} started')
+        while True:
+            stale = fail_stale_jobs(options['stale_after'])
+            if stale:
+                self.stdout.write(f'Marked {stale} stale job(s) as failed')
+
+            job = claim_next_job(worker)
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+                continue
+
+            self.stdout.write(f'Job {job.pk}: importing {job.path}')
+            try:
+                job = run_job(job)
+            except KeyboardInterrupt:
+                # Free the file for a new import instead of waiting for it to go stale
+                ImportJob.objects.filter(pk=job.pk).update(
+                    status=ImportJob.FAILED, error='Worker interrupted', finished_at=timezone.now()
+                )
+                raise
+            if job.status == ImportJob.DONE:
+                self.stdout.write(
+                    f'Job {job.pk}: done, {job.rows_done} rows at {job.stats["rows_per_sec"]} rows/sec'
+                )
+            else:
+                self.stdout.write(f'Job {job.pk}: failed, {job.error}')
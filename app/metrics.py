@@ -0,0 +1,185 @@
+import contextvars
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# In-process metrics, served in the Prometheus text format by the metrics/ view.
+# Every worker process keeps its own numbers, so scrape each one (or run a
+# single worker) rather than expecting totals across processes.
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+TOKEN_BUCKETS = (10, 50, 100, 250, 500, 1000, 2000, 4000, 8000, 16000)
+
+REGISTRY = []
+
+class Histogram:
+    """
+    Cumulative histogram with one series per combination of label values,
+    rendered as the usual _bucket/_sum/_count lines.
+    """
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            if index < len(self.buckets):
+                series['buckets'][index] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def collect(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = sorted((key, dict(value, buckets=list(value['buckets']))) for key, value in self._series.items())
+        for key, value in series:
+            labels = [f'{name}="{_escape(label)}"' for name, label in zip(self.labelnames, key)]
+            cumulative = 0
+            for bound, count in zip(self.buckets, value['buckets']):
+                cumulative += count
+                bucket_labels = _labels(labels + [f'le="{bound}"'])
+                lines.append(f'{self.name}_bucket{bucket_labels} {cumulative}')
+            inf_labels = _labels(labels + ['le="+Inf"'])
+            lines.append(f'{self.name}_bucket{inf_labels} {value["count"]}')
+            lines.append(f'{self.name}_sum{_labels(labels)} {value["sum"]}')
+            lines.append(f'{self.name}_count{_labels(labels)} {value["count"]}')
+        return lines
+
+class Gauge:
+    """
+    Value that goes up and down (or a running total with kind='counter'),
+    one series per combination of label values.
+    """
+
+    def __init__(self, name, documentation, labelnames=(), kind='gauge'):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.kind = kind
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def collect(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            labels = _labels([f'{name}="{_escape(label)}"' for name, label in zip(self.labelnames, key)])
+            lines.append(f'{self.name}{labels} {value}')
+        return lines
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _labels(labels):
+    return '{' + ','.join(labels) + '}' if labels else ''
+
+def render():
+    # Every registered metric in the Prometheus text exposition format
+    return '\n'.join(line for metric in REGISTRY for line in metric.collect()) + '\n'
+
+REQUEST_SECONDS = Histogram(
+    'http_request_duration_seconds', 'Wall time of a request until the response is returned.',
+    ['method', 'view', 'status'],
+)
+REQUEST_DB_QUERIES = Histogram(
+    'http_request_db_queries', 'Database queries run by a request.', ['view'], COUNT_BUCKETS,
+)
+REQUEST_DB_SECONDS = Histogram(
+    'http_request_db_seconds', 'Time a request spent waiting on database queries.', ['view'],
+)
+LLM_CALL_SECONDS = Histogram(
+    'llm_call_duration_seconds', 'Latency of a chat model call made through LLM.py.', ['model', 'status'],
+)
+LLM_TOKENS = Histogram(
+    'llm_tokens', 'Tokens per chat model call.', ['model', 'direction'], TOKEN_BUCKETS,
+)
+LLM_QUEUE_DEPTH = Gauge(
+    'llm_service_queue_depth', 'Model calls of the LLM service waiting for a free slot.',
+)
+LLM_IN_FLIGHT = Gauge(
+    'llm_service_in_flight', 'Model calls of the LLM service currently running.',
+)
+LLM_SERVICE_REQUESTS = Gauge(
+    'llm_service_requests_total', 'Requests to the LLM service by how they were answered.',
+    ['outcome'], kind='counter',
+)
+LLM_COALESCING_RATIO = Gauge(
+    'llm_service_coalescing_ratio', 'Share of LLM service requests that joined an identical call in flight.',
+)
+
+# Query stats of the code running in the current context, see track_db()
+_db_stats = contextvars.ContextVar('db_stats', default=None)
+
+def record_query(execute, sql, params, many, context):
+    """
+    Database execute wrapper, installed on every connection by
+    install_query_recorder. It only measures while track_db() is active,
+    and as the stats live in a context variable the queries of async views
+    (run by sync_to_async in another thread) are counted too.
+    """
+    stats = _db_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats['queries'] += 1
+        stats['seconds'] += time.perf_counter() - started
+
+def install_query_recorder(sender, connection, **kwargs):
+    # connection_created receiver
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+@contextmanager
+def track_db():
+    # Count the queries and the time spent in them inside the block
+    stats = {'queries': 0, 'seconds': 0.0}
+    token = _db_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _db_stats.reset(token)
@@ -0,0 +1,68 @@
+import cProfile
+import os
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from .metrics import REQUEST_DB_QUERIES, REQUEST_DB_SECONDS, REQUEST_SECONDS, track_db
+
+def view_label(request):
+    # URL name of the view, so metrics aren't split by ids in the path
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match else 'unmatched'
+
+def observe(request, response, elapsed, db):
+    view = view_label(request)
+    REQUEST_SECONDS.observe(elapsed, method=request.method, view=view, status=response.status_code)
+    REQUEST_DB_QUERIES.observe(db['queries'], view=view)
+    REQUEST_DB_SECONDS.observe(db['seconds'], view=view)
+    # Visible in the browser's network tab as well
+    response['Server-Timing'] = f'app;dur={elapsed * 1000:.1f}, db;dur={db["seconds"] * 1000:.1f}'
+
+def dump_profile(profiler, request, elapsed):
+    # Keep the cProfile stats of a slow request; open with python -m pstats or snakeviz
+    os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+    name = f'{time.strftime("%Y%m%d-%H%M%S")}-{request.method}-{view_label(request)}-{elapsed * 1000:.0f}ms.prof'
+    profiler.dump_stats(os.path.join(settings.PROFILE_DIR, name.replace(':', '_').replace('/', '_')))
+
+class TimingMiddleware:
+    """
+    Records the wall time, database query count and database time of every
+    request in the histograms of metrics.py. For streaming responses the time
+    runs until the response object is returned, not until the last byte.
+    With PROFILE_REQUESTS on, sync requests also run under cProfile and the
+    stats of those slower than PROFILE_SLOW_SECONDS are written to PROFILE_DIR.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        profiler = cProfile.Profile() if settings.PROFILE_REQUESTS else None
+        started = time.perf_counter()
+        with track_db() as db:
+            if profiler is not None:
+                response = profiler.runcall(self.get_response, request)
+            else:
+                response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+        observe(request, response, elapsed, db)
+        if profiler is not None and elapsed >= settings.PROFILE_SLOW_SECONDS:
+            dump_profile(profiler, request, elapsed)
+        return response
+
+    async def __acall__(self, request):
+        # cProfile only follows one thread and can't attribute time across
+        # awaits, so async requests are timed but never profiled
+        started = time.perf_counter()
+        with track_db() as db:
+            response = await self.get_response(request)
+        observe(request, response, time.perf_counter() - started, db)
+        return response
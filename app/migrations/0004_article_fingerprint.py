@@ -0,0 +1,40 @@
+# Generated by Django 4.2.15 on 2026-10-17 19:54
+
+from django.db import migrations, models
+from app.normalize import article_fingerprint
+
+
+def fill_fingerprints(apps, schema_editor):
+    # Fingerprint existing rows; rows repeated by earlier re-imports keep a
+    # NULL fingerprint so the unique index can still be built
+    Article = apps.get_model('app', 'Article')
+    seen = set()
+    pending = []
+    for article in Article.objects.order_by('id').only('id', 'url', 'title', 'source').iterator(chunk_size=2000):
+        fingerprint = article_fingerprint(article.url, article.title, article.source)
+        if fingerprint in seen:
+            continue
+        seen.add(fingerprint)
+        article.fingerprint = fingerprint
+        pending.append(article)
+        if len(pending) >= 2000:
+            Article.objects.bulk_update(pending, ['fingerprint'])
+            pending = []
+    if pending:
+        Article.objects.bulk_update(pending, ['fingerprint'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0003_alter_article_title'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='fingerprint',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True, unique=True),
+        ),
+        migrations.RunPython(fill_fingerprints, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.15 on 2026-10-17 19:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0004_article_fingerprint'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['-created_at', '-id'], name='article_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['source', '-created_at', '-id'], name='article_source_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['type', '-created_at', '-id'], name='article_type_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['theme', '-created_at', '-id'], name='article_theme_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['research_paper_type', '-created_at', '-id'], name='article_paper_type_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['final_level_1_consensus', '-created_at', '-id'], name='article_level1_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['final_level_2_consensus', '-created_at', '-id'], name='article_level2_created_idx'),
+        ),
+    ]
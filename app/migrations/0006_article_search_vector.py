@@ -0,0 +1,100 @@
+# Generated by Django 4.2.15 on 2026-10-17 19:57
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+# PostgreSQL: a trigger keeps search_vector current on every insert/update
+# (including bulk_create/bulk_update) and a GIN index serves the search
+POSTGRES_FORWARD = [
+    """
+    CREATE FUNCTION app_article_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(NEW.exclusion_reason_final_level_1, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(NEW.exclusion_reason_final_level_2, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER app_article_search_vector_trigger
+    BEFORE INSERT OR UPDATE ON app_article
+    FOR EACH ROW EXECUTE FUNCTION app_article_search_vector_update()
+    """,
+    # Fires the trigger for the rows that already exist
+    "UPDATE app_article SET title = title",
+    "CREATE INDEX article_search_vector_idx ON app_article USING GIN (search_vector)",
+]
+POSTGRES_REVERSE = [
+    "DROP INDEX IF EXISTS article_search_vector_idx",
+    "DROP TRIGGER IF EXISTS app_article_search_vector_trigger ON app_article",
+    "DROP FUNCTION IF EXISTS app_article_search_vector_update()",
+]
+
+# SQLite fallback: an external-content FTS5 table over the same columns,
+# kept in sync by triggers
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE app_article_fts USING fts5(
+        title, exclusion_reason_final_level_1, exclusion_reason_final_level_2,
+        content='app_article', content_rowid='id', tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER app_article_fts_insert AFTER INSERT ON app_article BEGIN
+        INSERT INTO app_article_fts(rowid, title, exclusion_reason_final_level_1, exclusion_reason_final_level_2)
+        VALUES (new.id, new.title, new.exclusion_reason_final_level_1, new.exclusion_reason_final_level_2);
+    END
+    """,
+    """
+    CREATE TRIGGER app_article_fts_delete AFTER DELETE ON app_article BEGIN
+        INSERT INTO app_article_fts(app_article_fts, rowid, title, exclusion_reason_final_level_1, exclusion_reason_final_level_2)
+        VALUES ('delete', old.id, old.title, old.exclusion_reason_final_level_1, old.exclusion_reason_final_level_2);
+    END
+    """,
+    """
+    CREATE TRIGGER app_article_fts_update AFTER UPDATE ON app_article BEGIN
+        INSERT INTO app_article_fts(app_article_fts, rowid, title, exclusion_reason_final_level_1, exclusion_reason_final_level_2)
+        VALUES ('delete', old.id, old.title, old.exclusion_reason_final_level_1, old.exclusion_reason_final_level_2);
+        INSERT INTO app_article_fts(rowid, title, exclusion_reason_final_level_1, exclusion_reason_final_level_2)
+        VALUES (new.id, new.title, new.exclusion_reason_final_level_1, new.exclusion_reason_final_level_2);
+    END
+    """,
+    "INSERT INTO app_article_fts(app_article_fts) VALUES ('rebuild')",
+]
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS app_article_fts_insert",
+    "DROP TRIGGER IF EXISTS app_article_fts_delete",
+    "DROP TRIGGER IF EXISTS app_article_fts_update",
+    "DROP TABLE IF EXISTS app_article_fts",
+]
+
+
+def run_statements(schema_editor, statements):
+    for statement in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement, params=None)
+
+
+def install_search(apps, schema_editor):
+    run_statements(schema_editor, {'postgresql': POSTGRES_FORWARD, 'sqlite': SQLITE_FORWARD})
+
+
+def remove_search(apps, schema_editor):
+    run_statements(schema_editor, {'postgresql': POSTGRES_REVERSE, 'sqlite': SQLITE_REVERSE})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0005_article_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(install_search, remove_search),
+    ]
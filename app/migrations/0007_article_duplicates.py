@@ -0,0 +1,61 @@
+# Generated by Django 4.2.15 on 2026-10-17 20:08
+
+from importlib import import_module
+from django.db import migrations, models
+import django.db.models.deletion
+from app.normalize import url_key
+
+search_migration = import_module('app.migrations.0006_article_search_vector')
+
+
+def fill_url_keys(apps, schema_editor):
+    # Title buckets and duplicate flags are left to: manage.py find_duplicates --rescan
+    Article = apps.get_model('app', 'Article')
+    pending = []
+    for article in Article.objects.order_by('id').only('id', 'url').iterator(chunk_size=2000):
+        article.url_key = url_key(article.url)
+        pending.append(article)
+        if len(pending) >= 2000:
+            Article.objects.bulk_update(pending, ['url_key'])
+            pending = []
+    if pending:
+        Article.objects.bulk_update(pending, ['url_key'])
+
+
+def restore_sqlite_fts(apps, schema_editor):
+    # On SQLite, adding url_key rebuilds app_article, which drops the FTS5 sync
+    # triggers from 0006; put them back and rebuild the index
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in search_migration.SQLITE_REVERSE[:3] + search_migration.SQLITE_FORWARD[1:]:
+        schema_editor.execute(statement, params=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0006_article_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='duplicate_of',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='duplicates', to='app.article'),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='url_key',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=64),
+        ),
+        migrations.RunPython(restore_sqlite_fts, migrations.RunPython.noop),
+        migrations.RunPython(fill_url_keys, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='TitleBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.BigIntegerField(db_index=True)),
+                ('article', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='title_buckets', to='app.article')),
+            ],
+        ),
+    ]
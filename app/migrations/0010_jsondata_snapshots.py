@@ -0,0 +1,48 @@
+# Generated by Django 4.2.15 on 2026-10-17 20:30
+
+from django.db import migrations, models
+
+
+def number_existing(apps, schema_editor):
+    # Rows saved before versioning get 1, 2, ... per name so the constraint holds
+    JSONData = apps.get_model('app', 'JSONData')
+    versions = {}
+    for item in JSONData.objects.order_by('id'):
+        versions[item.name] = versions.get(item.name, 0) + 1
+        if versions[item.name] > 1:
+            item.version = versions[item.name]
+            item.save(update_fields=['version'])
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0009_datasetversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jsondata',
+            name='content_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='jsondata',
+            name='row_hashes',
+            field=models.BinaryField(null=True),
+        ),
+        migrations.AddField(
+            model_name='jsondata',
+            name='rows',
+            field=models.BinaryField(null=True),
+        ),
+        migrations.AddField(
+            model_name='jsondata',
+            name='version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.RunPython(number_existing, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='jsondata',
+            constraint=models.UniqueConstraint(fields=('name', 'version'), name='jsondata_name_version_unique'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.15 on 2026-10-17 21:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0010_jsondata_snapshots'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['country_organisation', '-created_at', '-id'], name='article_country_created_idx'),
+        ),
+    ]
@@ -1,4 +1,6 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from .normalize import article_fingerprint, url_key
 
 class Article(models.Model):
     source = models.CharField(max_length=255, blank=True)
@@ -14,15 +16,116 @@ class Article(models.Model):
     research_paper_type = models.CharField(max_length=255, blank=True)
     country_organisation = models.CharField(max_length=255, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Hash of the normalized URL, title and source, used to make re-imports idempotent
+    fingerprint = models.CharField(max_length=64, unique=True, null=True, blank=True, editable=False)
+    # Weighted title + exclusion reasons, kept up to date by a database trigger (PostgreSQL only)
+    search_vector = SearchVectorField(null=True, editable=False)
+    # Hash of the normalized URL, shared by copies of a paper from different sources
+    url_key = models.CharField(max_length=64, blank=True, db_index=True, editable=False)
+    # Set on near-duplicates to the earliest Article of their cluster, see dedup.py
+    duplicate_of = models.ForeignKey(
+        'self', null=True, blank=True, on_delete=models.SET_NULL, related_name='duplicates'
+    )
     
+    class Meta:
+        # Each filter used by the admin and the list API is paired with the
+        # (created_at, id) ordering, so a filtered page is an index range scan
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='article_created_id_idx'),
+            models.Index(fields=['source', '-created_at', '-id'], name='article_source_created_idx'),
+            models.Index(fields=['type', '-created_at', '-id'], name='article_type_created_idx'),
+            models.Index(fields=['theme', '-created_at', '-id'], name='article_theme_created_idx'),
+            models.Index(fields=['country_organisation', '-created_at', '-id'], name='article_country_created_idx'),
+            models.Index(fields=['research_paper_type', '-created_at', '-id'], name='article_paper_type_created_idx'),
+            models.Index(fields=['final_level_1_consensus', '-created_at', '-id'], name='article_level1_created_idx'),
+            models.Index(fields=['final_level_2_consensus', '-created_at', '-id'], name='article_level2_created_idx'),
+        ]
+
     def __str__(self):
         return self.title[:50] if self.title else f"Article {self.id}"
 
-# In case I need it in the future (not used for now)
+    def save(self, *args, **kwargs):
+        if not self.fingerprint:
+            self.fingerprint = article_fingerprint(self.url, self.title, self.source)
+        if not self.url_key:
+            self.url_key = url_key(self.url)
+        super().save(*args, **kwargs)
+
+class TitleBucket(models.Model):
+    # One MinHash LSH band of an Article title. Articles sharing a bucket are
+    # near-duplicate candidates, so finding them is an index lookup, not a scan
+    article = models.ForeignKey(Article, on_delete=models.CASCADE, related_name='title_buckets')
+    bucket = models.BigIntegerField(db_index=True)
+
+class ImportJob(models.Model):
+    # A file import queued by store-json/ or store-xlsx/ and run by the
+    # run_import_jobs worker, see jobs.py
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [(QUEUED, 'Queued'), (RUNNING, 'Running'), (DONE, 'Done'), (FAILED, 'Failed')]
+    ACTIVE = [QUEUED, RUNNING]
+
+    kind = models.CharField(max_length=10, choices=[('json', 'JSON'), ('xlsx', 'Excel')])
+    path = models.TextField()
+    options = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    rows_done = models.PositiveIntegerField(default=0)
+    # Unknown for streamed JSON, where progress comes from the bytes read instead
+    rows_total = models.PositiveIntegerField(null=True, blank=True)
+    progress = models.FloatField(default=0.0)
+    stats = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    worker = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    # Updated with every batch, so a job whose worker died can be spotted
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            # Only one queued or running import per file, so two can't race
+            models.UniqueConstraint(
+                fields=['path'],
+                condition=models.Q(status__in=['queued', 'running']),
+                name='importjob_one_active_per_path',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'id'], name='importjob_status_id_idx'),
+        ]
+
+    def __str__(self):
+        return f"ImportJob {self.id} ({self.kind}, {self.status})"
+
+class DatasetVersion(models.Model):
+    # Single row counting changes to the Article table; read endpoints use it
+    # for their ETag and Last-Modified headers, see dataset.py
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField()
+
+# Snapshot of an imported file, one per import, see snapshots.py. data holds
+# a summary of the import; the rows and their hashes are stored compressed
 class JSONData(models.Model):
     data = models.JSONField()
     name = models.CharField(max_length=255, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
-   
+    # Counts up per name; the latest version is what the next import diffs against
+    version = models.PositiveIntegerField(default=1)
+    # sha256 of the serialized rows, so an unchanged file is skipped outright
+    content_hash = models.CharField(max_length=64, blank=True, editable=False)
+    # zlib-compressed JSON array of the rows as read from the file
+    rows = models.BinaryField(null=True, editable=False)
+    # Packed (article fingerprint, row hash) pairs, see snapshots.pack_hashes
+    row_hashes = models.BinaryField(null=True, editable=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['name', 'version'], name='jsondata_name_version_unique'),
+        ]
+
     def __str__(self):
-        return self.name or f"JSONData {self.id}"
\ No newline at end of file
+        name = self.name or f"JSONData {self.id}"
+        return f"{name} v{self.version}"
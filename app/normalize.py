@@ -0,0 +1,43 @@
+import hashlib
+import re
+from urllib.parse import urlsplit
+
+# The export sometimes packs several quoted values into the URL column, e.g.
+# '""http://…/Price-2016.pdf"";""wait..."";""1', so pick out the first real URL
+URL_RE = re.compile(r'https?://[^\s";]+', re.IGNORECASE)
+NON_WORD_RE = re.compile(r'[^\w]+')
+TRAILING_ELLIPSIS_RE = re.compile(r'(\.{3}|…)\s*$')
+
+def normalize_url(url):
+    # Scheme, "www.", fragment and trailing slash don't identify a different page
+    url = (url or '').strip()
+    match = URL_RE.search(url)
+    if not match:
+        return url.strip('"; ').lower()
+    parts = urlsplit(match.group(0))
+    host = parts.netloc.lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    path = parts.path.rstrip('/')
+    query = f'?{parts.query}' if parts.query else ''
+    return f'{host}{path}{query}'
+
+def normalize_title(title):
+    # Case, punctuation, spacing and a trailing "..." from truncation are ignored
+    title = TRAILING_ELLIPSIS_RE.sub('', (title or '').strip())
+    return ' '.join(NON_WORD_RE.sub(' ', title.casefold()).split())
+
+def normalize_source(source):
+    return ' '.join((source or '').casefold().split())
+
+def url_key(url):
+    # Hash of the normalized URL, blank when the column holds no http(s) URL
+    # (some rows only have a placeholder such as "NMA")
+    if not URL_RE.search(url or ''):
+        return ''
+    return hashlib.sha256(normalize_url(url).encode('utf-8')).hexdigest()
+
+def article_fingerprint(url, title, source):
+    # Stable per-article key used to make ingestion idempotent
+    key = '\x1f'.join([normalize_url(url), normalize_title(title), normalize_source(source)])
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
@@ -0,0 +1,122 @@
+import base64
+from datetime import datetime
+from django.db.models import Q
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# Query parameters that filter the article list (exact match, repeat for OR)
+FILTER_FIELDS = [
+    'source',
+    'type',
+    'theme',
+    'research_paper_type',
+    'final_level_1_consensus',
+    'final_level_2_consensus',
+]
+
+# Fields that can be requested with ?fields=, in response order
+LIST_FIELDS = [
+    'id',
+    'source',
+    'type',
+    'date_access',
+    'url',
+    'final_level_1_consensus',
+    'exclusion_reason_final_level_1',
+    'final_level_2_consensus',
+    'exclusion_reason_final_level_2',
+    'title',
+    'theme',
+    'research_paper_type',
+    'country_organisation',
+    'created_at',
+    'duplicate_of',
+]
+
+# Newest first, with id as a tie breaker so the order is total
+KEYSET_ORDERING = ('-created_at', '-id')
+
+def filter_articles(queryset, params):
+    # Apply the ?source=...&theme=... style filters from a QueryDict
+    for field in FILTER_FIELDS:
+        values = params.getlist(field)
+        if len(values) == 1:
+            queryset = queryset.filter(**{field: values[0]})
+        elif values:
+            queryset = queryset.filter(**{f'{field}__in': values})
+
+    # ?duplicates=exclude hides flagged near-duplicates, ?duplicates=only lists just them
+    duplicates = params.get('duplicates')
+    if duplicates == 'exclude':
+        queryset = queryset.filter(duplicate_of__isnull=True)
+    elif duplicates == 'only':
+        queryset = queryset.filter(duplicate_of__isnull=False)
+    elif duplicates:
+        raise ValueError(f'Invalid duplicates: {duplicates}')
+    return queryset
+
+def parse_fields(value):
+    # ?fields=id,title,source -> ['id', 'title', 'source']; all fields by default
+    if not value:
+        return list(LIST_FIELDS)
+    fields = [field.strip() for field in value.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in LIST_FIELDS]
+    if unknown:
+        raise ValueError(f'Unknown fields: {", ".join(unknown)}')
+    return fields
+
+def parse_limit(value, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    if value in (None, ''):
+        return default
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        limit = 0
+    if limit < 1:
+        raise ValueError(f'Invalid limit: {value}')
+    return min(limit, maximum)
+
+def encode_cursor(created_at, pk):
+    raw = f'{created_at.isoformat()}|{pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, pk = raw.rsplit('|', 1)
+        return datetime.fromisoformat(created_at), int(pk)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError('Invalid cursor')
+
+def _page_query(queryset, fields, limit, cursor):
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+
+    # created_at and id are always fetched since the cursor is built from them
+    columns = list(dict.fromkeys([*fields, 'created_at', 'id']))
+    return queryset.order_by(*KEYSET_ORDERING).values(*columns)[:limit + 1]
+
+def _page_results(rows, fields, limit):
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]['created_at'], rows[-1]['id'])
+
+    results = [{field: row[field] for field in fields} for row in rows]
+    return results, next_cursor
+
+def keyset_page(queryset, fields, limit, cursor=None):
+    """
+    Return one page of articles (as dicts with only the requested fields) and
+    the cursor for the next page. Pages continue after the (created_at, id)
+    of the last row instead of using OFFSET, so every page costs the same.
+    """
+    rows = list(_page_query(queryset, fields, limit, cursor))
+    return _page_results(rows, fields, limit)
+
+async def akeyset_page(queryset, fields, limit, cursor=None):
+    # keyset_page for async views
+    rows = [row async for row in _page_query(queryset, fields, limit, cursor)]
+    return _page_results(rows, fields, limit)
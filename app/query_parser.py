@@ -0,0 +1,197 @@
+import re
+
+# Search syntax the prompts ask the model to use, e.g.
+#   online learning AND (education OR e-learning) AND "student engagement" NOT children*
+# Operators are upper case; terms next to each other are AND'ed; a trailing *
+# makes a prefix (wildcard) term and double quotes make a phrase.
+# NOT only narrows down an AND group that also has positive terms, e.g.
+# "screening NOT children". A negation with nothing to subtract from (inside
+# an OR, or a query of only NOT terms) is dropped, so "a OR NOT b" means "a"
+# and "NOT b" matches nothing, on PostgreSQL and SQLite alike.
+TOKEN_RE = re.compile(r'(-?)"([^"]*)"?|(\()|(\))|([^\s()"]+)')
+WORD_RE = re.compile(r'\w+')
+OPERATORS = {'AND', 'OR', 'NOT'}
+# Lower-case filler words that would otherwise become required terms
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'by', 'for', 'from', 'in', 'is',
+    'not', 'of', 'on', 'or', 'the', 'to', 'with',
+}
+
+def tokenize(text):
+    tokens = []
+    for negated, phrase, open_paren, close_paren, word in TOKEN_RE.findall(text):
+        if open_paren:
+            tokens.append(('(', None))
+        elif close_paren:
+            tokens.append((')', None))
+        elif word:
+            if word in OPERATORS:
+                tokens.append((word, None))
+            elif word == '-':
+                continue
+            elif word.startswith('-') and len(word) > 1:
+                # -term is a shorthand for NOT term
+                tokens.append(('NOT', None))
+                tokens.append(('WORD', word[1:]))
+            else:
+                tokens.append(('WORD', word))
+        else:
+            words = WORD_RE.findall(phrase.lower())
+            if words:
+                if negated:
+                    tokens.append(('NOT', None))
+                tokens.append(('PHRASE', words))
+    return tokens
+
+def word_node(word):
+    # A bare word can still hold several tokens (e-learning, AI/ML), which
+    # are matched as a phrase, or as separate terms when it ends in *
+    prefix = word.endswith('*')
+    words = WORD_RE.findall(word.lower())
+    if len(words) == 1:
+        return None if words[0] in STOPWORDS else ('term', words[0], prefix)
+    if not words:
+        return None
+    if not prefix:
+        return ('phrase', words)
+    return ('and', [('term', w, False) for w in words[:-1]] + [('term', words[-1], True)])
+
+class _Parser:
+    """
+    Recursive descent over the tokens. It never fails on model output:
+    unbalanced parentheses are closed at the end, dangling operators are
+    ignored and empty groups disappear.
+    """
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self):
+        return self.tokens[self.pos][0] if self.pos < len(self.tokens) else None
+
+    def take(self):
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def parse(self):
+        node = self.parse_or()
+        # Stray closing parentheses: keep parsing what follows
+        while self.pos < len(self.tokens):
+            self.take()
+            rest = self.parse_or()
+            node = combine('and', [node, rest])
+        return node
+
+    def parse_or(self):
+        nodes = [self.parse_and()]
+        while self.peek() == 'OR':
+            self.take()
+            nodes.append(self.parse_and())
+        return combine('or', nodes)
+
+    def parse_and(self):
+        nodes = []
+        while self.peek() not in (None, ')', 'OR'):
+            if self.peek() == 'AND':
+                self.take()
+                continue
+            nodes.append(self.parse_not())
+        return combine('and', nodes)
+
+    def parse_not(self):
+        if self.peek() == 'NOT':
+            self.take()
+            if self.peek() in (None, ')', 'OR', 'AND'):
+                return None
+            node = self.parse_not()
+            if node is None:
+                return None
+            # NOT NOT x is x
+            return node[1] if node[0] == 'not' else ('not', node)
+        return self.parse_atom()
+
+    def parse_atom(self):
+        kind, value = self.take()
+        if kind == '(':
+            node = self.parse_or()
+            if self.peek() == ')':
+                self.take()
+            return node
+        if kind == 'PHRASE':
+            return ('phrase', value) if len(value) > 1 else ('term', value[0], False)
+        return word_node(value)
+
+def combine(operator, nodes):
+    nodes = [node for node in nodes if node is not None]
+    if not nodes:
+        return None
+    if len(nodes) == 1:
+        return nodes[0]
+    return (operator, nodes)
+
+def anchor_negations(node):
+    # Drop the negations that aren't part of an AND group with a positive term
+    if node is None or node[0] == 'not':
+        return None
+    if node[0] in ('term', 'phrase'):
+        return node
+    if node[0] == 'or':
+        return combine('or', [anchor_negations(child) for child in node[1]])
+    positives = [anchor_negations(child) for child in node[1] if child[0] != 'not']
+    if not any(positives):
+        return None
+    negatives = [anchor_negations(child[1]) for child in node[1] if child[0] == 'not']
+    return combine('and', positives + [('not', negative) for negative in negatives if negative is not None])
+
+def parse_query(text):
+    """
+    Parse boolean search syntax into a small tree of tuples:
+    ('term', word, is_prefix), ('phrase', [words]), ('and', [nodes]),
+    ('or', [nodes]) or ('not', node). A 'not' only appears inside an 'and'
+    next to at least one positive node. Returns None if nothing searchable
+    is left.
+    """
+    return anchor_negations(_Parser(tokenize(text or '')).parse())
+
+def to_tsquery(node):
+    # PostgreSQL to_tsquery() syntax; lexemes are stemmed by the search config
+    kind = node[0]
+    if kind == 'term':
+        return f"'{node[1]}':*" if node[2] else f"'{node[1]}'"
+    if kind == 'phrase':
+        return '(' + ' <-> '.join(f"'{word}'" for word in node[1]) + ')'
+    if kind == 'not':
+        return f'!{to_tsquery(node[1])}'
+    separator = ' & ' if kind == 'and' else ' | '
+    return '(' + separator.join(to_tsquery(child) for child in node[1]) + ')'
+
+def to_fts5(node):
+    """
+    SQLite FTS5 MATCH syntax. FTS5 only has a binary NOT, so negated parts of
+    an AND group are subtracted from the rest, which parse_query guarantees
+    exist.
+    """
+    kind = node[0]
+    if kind == 'term':
+        return f'"{node[1]}"*' if node[2] else f'"{node[1]}"'
+    if kind == 'phrase':
+        return '"' + ' '.join(node[1]) + '"'
+    if kind == 'not':
+        return None
+    if kind == 'or':
+        parts = [part for part in (to_fts5(child) for child in node[1]) if part]
+        return '(' + ' OR '.join(parts) + ')' if parts else None
+
+    positives = [to_fts5(child) for child in node[1] if child[0] != 'not']
+    positives = [part for part in positives if part]
+    if not positives:
+        return None
+    expression = '(' + ' AND '.join(positives) + ')'
+    for child in node[1]:
+        if child[0] == 'not':
+            negative = to_fts5(child[1])
+            if negative:
+                expression = f'({expression} NOT {negative})'
+    return expression
@@ -0,0 +1,78 @@
+import re
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import F, FloatField, Value
+from django.db.models.expressions import RawSQL
+from .query_parser import parse_query, to_fts5, to_tsquery
+
+SEARCH_CONFIG = 'english'
+FTS_TABLE = 'app_article_fts'
+# bm25 column weights for the SQLite index: title, then the two exclusion reasons
+FTS_WEIGHTS = '10.0, 3.0, 3.0'
+WORD_RE = re.compile(r'\w+')
+
+def fts_match_expression(text):
+    # Quote every word so user input can't be parsed as FTS5 query syntax
+    return ' '.join(f'"{word}"' for word in WORD_RE.findall(text))
+
+def match_fts(queryset, expression):
+    # Filter by an FTS5 MATCH expression (SQLite only)
+    if not expression:
+        return queryset.none()
+    return queryset.filter(id__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [expression]))
+
+def match_boolean(queryset, text):
+    # Unranked filter for the boolean query syntax of boolean_search
+    node = parse_query(text)
+    if node is None:
+        return queryset.none()
+    if connection.vendor == 'postgresql':
+        return queryset.filter(search_vector=SearchQuery(to_tsquery(node), config=SEARCH_CONFIG, search_type='raw'))
+    return match_fts(queryset, to_fts5(node))
+
+def rank_articles(queryset, postgres_query=None, fts_expression=None):
+    # Annotate and order by rank, best match first, in a single query
+    if connection.vendor == 'postgresql' and postgres_query is not None:
+        return (
+            queryset.filter(search_vector=postgres_query)
+            .annotate(rank=SearchRank(F('search_vector'), postgres_query))
+            .order_by('-rank', '-id')
+        )
+    if connection.vendor == 'postgresql' or not fts_expression:
+        return queryset.none().annotate(rank=Value(0.0, output_field=FloatField()))
+    table = connection.ops.quote_name(queryset.model._meta.db_table)
+    return queryset.extra(
+        tables=[FTS_TABLE],
+        where=[f'{FTS_TABLE}.rowid = {table}.id', f'{FTS_TABLE} MATCH %s'],
+        params=[fts_expression],
+        # bm25() is lower for better matches, so negate it to sort like ts_rank
+        select={'rank': f'-bm25({FTS_TABLE}, {FTS_WEIGHTS})'},
+    ).order_by('-rank', '-id')
+
+def search_articles(queryset, text):
+    """
+    Ranked full-text search over title (weighted highest) and the Level 1 and
+    Level 2 exclusion reasons. Uses the GIN-indexed search_vector on
+    PostgreSQL and the FTS5 table elsewhere.
+    """
+    return rank_articles(
+        queryset,
+        postgres_query=SearchQuery(text, config=SEARCH_CONFIG, search_type='websearch'),
+        fts_expression=fts_match_expression(text),
+    )
+
+def boolean_search(queryset, text):
+    """
+    Ranked search for boolean query syntax (AND/OR/NOT, parentheses, "phrases"
+    and trailing * wildcards), such as a generated refined_query. The query is
+    compiled to a tsquery or FTS5 expression so it runs on the search index
+    in a single query.
+    """
+    node = parse_query(text)
+    if node is None:
+        return rank_articles(queryset)
+    return rank_articles(
+        queryset,
+        postgres_query=SearchQuery(to_tsquery(node), config=SEARCH_CONFIG, search_type='raw'),
+        fts_expression=to_fts5(node),
+    )
@@ -0,0 +1,33 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .dataset import bump_dataset_version
+from .dedup import flag_duplicates
+from .facets import invalidate_facets
+from .models import Article
+from .vectors import remove_from_vector_index, update_vector_index
+
+def articles_changed():
+    # Drop everything derived from the Article table. Runs after single saves
+    # (through the signals below) and after bulk ingestion, which sends no signals
+    invalidate_facets()
+    # New ETags for the read endpoints, which also retires the facets in other processes
+    bump_dataset_version()
+
+@receiver(post_save, sender=Article)
+@receiver(post_delete, sender=Article)
+def article_changed(sender, **kwargs):
+    # Wait for the commit so a concurrent read can't re-cache the old data
+    transaction.on_commit(articles_changed)
+
+@receiver(post_save, sender=Article)
+def article_saved(sender, instance, created, **kwargs):
+    if created:
+        flag_duplicates([instance])
+    # Re-embed the title
+    transaction.on_commit(lambda: update_vector_index([instance.pk]))
+
+@receiver(post_delete, sender=Article)
+def article_deleted(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: remove_from_vector_index([pk]))
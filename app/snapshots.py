@@ -0,0 +1,253 @@
+import hashlib
+import json
+import time
+import zlib
+from contextlib import nullcontext
+from django.db import connection, transaction
+from .ingestion import DEFAULT_BATCH_SIZE, FIELD_MAP, build_article, ingest_articles
+from .models import Article, JSONData, TitleBucket
+from .signals import articles_changed
+from .vectors import remove_from_vector_index
+
+# A row hash is a 16 byte blake2b digest of the mapped columns of a row; the
+# key is the article fingerprint (a sha256 hex digest) as 32 raw bytes
+ROW_HASH_SIZE = 16
+RECORD_SIZE = 32 + ROW_HASH_SIZE
+DELETE_CHUNK_SIZE = 2000
+# Snapshots kept per name; older ones are deleted after each import
+KEEP_SNAPSHOTS = 5
+HASHED_COLUMNS = ['Date Access', *FIELD_MAP]
+
+def row_hash(row):
+    values = [row.get(column) for column in HASHED_COLUMNS]
+    text = '\x1f'.join('' if value is None else str(value) for value in values)
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=ROW_HASH_SIZE).digest()
+
+def pack_hashes(hashes):
+    # Fixed size binary records compress poorly but load far faster than JSON
+    return zlib.compress(b''.join(bytes.fromhex(key) + value for key, value in hashes.items()), 1)
+
+def unpack_hashes(packed):
+    data = zlib.decompress(packed)
+    return {
+        data[i:i + 32].hex(): data[i + 32:i + RECORD_SIZE]
+        for i in range(0, len(data), RECORD_SIZE)
+    }
+
+def serialize_row(row):
+    # Spreadsheet rows hold datetimes, which are stored in the export's own format
+    return json.dumps(row, default=lambda value: value.strftime('%Y-%m-%d %H:%M:%S'), sort_keys=True).encode('utf-8')
+
+class RowScan:
+    """
+    A single pass over the rows of a file. Every row is hashed and written
+    to the compressed snapshot as it goes by, and rows() yields only those
+    that need applying, so memory holds the hashes rather than the file.
+
+    A row identical to one in the previous snapshot reuses its fingerprint
+    (only new and edited rows pay for build_article) and is skipped, unless
+    its fingerprint is in reapply or full is set. When the file repeats an
+    article the first row wins, as in ingestion.upsert_batch.
+    """
+
+    def __init__(self, previous_hashes, reapply=frozenset(), full=False):
+        self.previous = previous_hashes
+        self.known = {value: key for key, value in previous_hashes.items()}
+        self.reapply = reapply
+        self.full = full
+        self.hashes = {}
+        self.rows_read = 0
+        self.applied = 0
+        self.inserted = 0
+        self.changed = 0
+        self.reapplied = 0
+        self._sha = hashlib.sha256()
+        self._compressor = zlib.compressobj()
+        self._chunks = []
+
+    def _write(self, data):
+        self._sha.update(data)
+        self._chunks.append(self._compressor.compress(data))
+
+    def rows(self, rows):
+        # Written the way json.dumps writes the whole list, so content
+        # hashes of earlier snapshots still compare equal
+        self._write(b'[')
+        for row in rows:
+            self._write((b', ' if self.rows_read else b'') + serialize_row(row))
+            self.rows_read += 1
+            digest = row_hash(row)
+            fingerprint = self.known.get(digest)
+            unchanged = fingerprint is not None
+            if fingerprint is None:
+                fingerprint = build_article(row).fingerprint
+            if fingerprint in self.hashes:
+                continue
+            self.hashes[fingerprint] = digest
+            if fingerprint not in self.previous:
+                self.inserted += 1
+            elif not unchanged:
+                self.changed += 1
+            elif fingerprint in self.reapply:
+                self.reapplied += 1
+            elif not self.full:
+                continue
+            self.applied += 1
+            yield row
+        self._write(b']')
+
+    @property
+    def content_hash(self):
+        return self._sha.hexdigest()
+
+    def compressed(self):
+        return b''.join(self._chunks) + self._compressor.flush()
+
+def latest_snapshot(name):
+    return JSONData.objects.filter(name=name).order_by('-version').first()
+
+def other_snapshots(name):
+    # The latest snapshot of every other file
+    others = JSONData.objects.exclude(name=name).values_list('name', flat=True).distinct()
+    for other in others:
+        snapshot = latest_snapshot(other)
+        if snapshot is not None and snapshot.row_hashes:
+            yield snapshot
+
+def owned_elsewhere(name, fingerprints):
+    """
+    The fingerprints that are still in the latest snapshot of a file other
+    than name. An article dropped from one file stays while another file
+    has it, and is deleted once it's gone from every file.
+    """
+    remaining = set(fingerprints)
+    kept = set()
+    for snapshot in other_snapshots(name):
+        if not remaining:
+            break
+        found = remaining.intersection(unpack_hashes(snapshot.row_hashes))
+        kept |= found
+        remaining -= found
+    return kept
+
+def written_elsewhere_since(name, previous):
+    """
+    Fingerprints of the articles other files have imported since the
+    previous snapshot of name. Their rows may have overwritten what this
+    file holds, so they are applied again even when this file didn't change.
+    """
+    if previous is None:
+        return frozenset()
+    fingerprints = set()
+    for snapshot in other_snapshots(name):
+        if snapshot.id > previous.id:
+            fingerprints.update(unpack_hashes(snapshot.row_hashes))
+    return fingerprints
+
+def delete_articles(fingerprints, batch_size=DELETE_CHUNK_SIZE):
+    """
+    Delete the Articles with these fingerprints with a few bulk statements
+    per chunk. QuerySet.delete() would load every article to send its
+    post_delete signal, so the title buckets and duplicate_of links that
+    point at them are cleared here instead, and their vectors are removed
+    once the deletes commit. Returns the number deleted.
+    """
+    table = connection.ops.quote_name(Article._meta.db_table)
+    deleted = 0
+    deleted_ids = []
+    for start in range(0, len(fingerprints), batch_size):
+        ids = list(
+            Article.objects.filter(fingerprint__in=fingerprints[start:start + batch_size]).values_list('id', flat=True)
+        )
+        if not ids:
+            continue
+        TitleBucket.objects.filter(article_id__in=ids).delete()
+        Article.objects.filter(duplicate_of_id__in=ids).update(duplicate_of=None)
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {table} WHERE id IN ({", ".join(["%s"] * len(ids))})', ids)
+            deleted += cursor.rowcount
+        deleted_ids.extend(ids)
+    if deleted_ids:
+        transaction.on_commit(lambda: remove_from_vector_index(deleted_ids))
+    return deleted
+
+def import_snapshot(name, rows, batch_size=DEFAULT_BATCH_SIZE, full=False, atomic=True, progress=None):
+    """
+    Import a whole file by diffing it against the latest snapshot stored
+    under name. Only rows that are new or whose values changed since then go
+    through ingest_articles, and articles whose rows disappeared from the
+    file are deleted unless another file's latest snapshot still has them;
+    an unchanged row costs a hash and nothing else. The file is then stored
+    as the next snapshot. Without an earlier snapshot, or with full=True,
+    every row is upserted (removals still apply).
+
+    Articles several files share hold the values of whichever file was
+    imported last: unchanged rows that another file has imported since are
+    applied again. Edits made outside of file imports (the admin, streamed
+    imports) are only overwritten by an import with full=True.
+
+    rows may be a generator: it is read once, and only the hashes, the
+    compressed snapshot and a batch of rows are held in memory. The
+    snapshot is written last, so with atomic=False (batches commit on their
+    own, as in background jobs) a failed run can be repeated and diffs
+    against the same snapshot again. progress is called like
+    ingest_articles' with every row read so far counted as done.
+    """
+    started = time.perf_counter()
+    previous = latest_snapshot(name)
+    previous_hashes = unpack_hashes(previous.row_hashes) if previous is not None and previous.row_hashes else {}
+    full = full or previous is None
+    scan = RowScan(previous_hashes, reapply=written_elsewhere_since(name, previous), full=full)
+
+    report = None
+    if progress is not None:
+        report = lambda rows_done, totals: progress(scan.rows_read, totals)
+
+    with transaction.atomic() if atomic else nullcontext():
+        stats = ingest_articles(scan.rows(rows), batch_size=batch_size, atomic=atomic, progress=report)
+        removed = [key for key in previous_hashes if key not in scan.hashes]
+        if removed:
+            kept = owned_elsewhere(name, removed)
+            removed = [key for key in removed if key not in kept]
+        with transaction.atomic(savepoint=False):
+            removed_count = delete_articles(removed)
+            if removed_count:
+                transaction.on_commit(articles_changed)
+            if previous is not None and previous.content_hash == scan.content_hash and not (full or scan.applied):
+                # Same file as last time and nothing to re-apply: keep its snapshot
+                snapshot = previous
+            else:
+                snapshot = JSONData.objects.create(
+                    name=name,
+                    version=previous.version + 1 if previous is not None else 1,
+                    content_hash=scan.content_hash,
+                    rows=scan.compressed(),
+                    row_hashes=pack_hashes(scan.hashes),
+                    data={
+                        'rows': scan.rows_read,
+                        'articles': len(scan.hashes),
+                        'inserted': scan.inserted,
+                        'changed': scan.changed,
+                        'reapplied': scan.reapplied,
+                        'removed': len(removed),
+                        'full': full,
+                    },
+                )
+                stale = JSONData.objects.filter(name=name).order_by('-version').values_list('id', flat=True)
+                JSONData.objects.filter(id__in=list(stale[KEEP_SNAPSHOTS:])).delete()
+
+    elapsed = time.perf_counter() - started
+    articles = len(scan.hashes)
+    stats.update({
+        'rows_processed': scan.rows_read,
+        'rows_applied': scan.applied,
+        'articles_unchanged': stats['articles_unchanged'] + articles - scan.applied,
+        'articles_reapplied': scan.reapplied,
+        'duplicate_rows': scan.rows_read - articles,
+        'articles_removed': removed_count,
+        'snapshot': name,
+        'snapshot_version': snapshot.version,
+        'elapsed_seconds': round(elapsed, 4),
+        'rows_per_sec': round(scan.rows_read / elapsed, 1) if elapsed > 0 else None,
+    })
+    return stats
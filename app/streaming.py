@@ -0,0 +1,113 @@
+import json
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\n\r'
+
+def _skip_whitespace(buffer, pos):
+    while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+        pos += 1
+    return pos
+
+def iter_json_array(file_obj, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Yield the items of a top-level JSON array one at a time, reading the file
+    in chunks. Only the current chunk and the item being decoded are kept in
+    memory, so memory use doesn't grow with the size of the file.
+    """
+    buffer = ''
+    pos = 0
+    eof = False
+
+    def read_more():
+        nonlocal buffer, pos, eof
+        chunk = file_obj.read(chunk_size)
+        if not chunk:
+            eof = True
+            return
+        # Drop what has already been consumed before appending the next chunk
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+    def next_char():
+        # Position of the next non-whitespace character, reading more if needed
+        nonlocal pos
+        while True:
+            pos = _skip_whitespace(buffer, pos)
+            if pos < len(buffer) or eof:
+                return pos
+            read_more()
+
+    if next_char() >= len(buffer) or buffer[pos] != '[':
+        raise json.JSONDecodeError('Expecting a top-level JSON array', buffer, pos)
+    pos += 1
+
+    if next_char() < len(buffer) and buffer[pos] == ']':
+        return
+
+    while True:
+        next_char()
+        while True:
+            try:
+                item, end = _decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                read_more()
+                continue
+            # A value cut off by the end of the buffer (e.g. a number) may
+            # continue in the next chunk, so only accept it once the
+            # delimiter after it has been read
+            after = _skip_whitespace(buffer, end)
+            if not eof and (after == len(buffer) or buffer[after] not in ',]'):
+                read_more()
+                continue
+            break
+        pos = end
+        yield item
+
+        if next_char() >= len(buffer):
+            raise json.JSONDecodeError('Unterminated JSON array', buffer, pos)
+        if buffer[pos] == ']':
+            return
+        if buffer[pos] != ',':
+            raise json.JSONDecodeError("Expecting ',' delimiter", buffer, pos)
+        pos += 1
+
+def iter_xlsx_rows(path, sheet_name=None):
+    """
+    Yield the data rows of an Excel workbook as dicts keyed by the header row,
+    the same shape as the items of the JSON export. The workbook is opened in
+    read-only mode, so rows are streamed from the file instead of loaded at once.
+    """
+    # openpyxl is only needed for workbook imports
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        sheet = workbook[sheet_name] if sheet_name else workbook.active
+        rows = sheet.iter_rows(values_only=True)
+        header_row = next(rows, None)
+        if header_row is None:
+            return
+        headers = [str(header).strip() if header is not None else None for header in header_row]
+        for values in rows:
+            # Skip blank rows left at the bottom of the sheet
+            if all(value is None for value in values):
+                continue
+            yield {header: value for header, value in zip(headers, values) if header}
+    finally:
+        workbook.close()
+
+def xlsx_row_count(path, sheet_name=None):
+    # Data rows of a sheet as recorded in its dimensions, without reading the
+    # rows themselves (blank rows at the bottom are included)
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        sheet = workbook[sheet_name] if sheet_name else workbook.active
+        return max((sheet.max_row or 1) - 1, 0)
+    finally:
+        workbook.close()
@@ -0,0 +1,35 @@
+import random
+
+# Value pools that look like the screening export, used by the benchmark commands
+SOURCES = ['GAS', 'PubMed', 'Scopus', 'Embase', 'Web of Science', 'Google']
+TYPES = ['Grey', 'Non-Grey']
+THEMES = ['Guidelines', 'Screening', 'Diagnosis', 'Treatment', 'Awareness', 'Risk Factors', 'Policy']
+PAPER_TYPES = ['Review', 'Guidelines/Recommendations', 'Cohort Study', 'RCT', 'Report', 'Cross-sectional']
+CONSENSUS = ['Include', 'Exclude', 'Maybe']
+COUNTRIES = ['United States', 'United Kingdom', 'Australia', 'Malaysia', 'Canada', 'WHO']
+WORDS = (
+    'prostate cancer screening early detection antigen testing risk adapted strategy '
+    'guidelines recommendations population based cohort outcomes mortality biopsy '
+    'magnetic resonance imaging active surveillance overdiagnosis shared decision making'
+).split()
+
+def synthetic_rows(count, seed=0):
+    # Yield export-style row dicts (same headers as the tableConvert JSON)
+    rng = random.Random(seed)
+    for i in range(count):
+        level_1 = rng.choice(CONSENSUS)
+        level_2 = rng.choice(CONSENSUS) if level_1 == 'Include' else ''
+        yield {
+            'Source': rng.choice(SOURCES),
+            'Type': rng.choice(TYPES),
+            'Date Access': f'2022-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} 00:00:00',
+            'URL': f'https://example.org/articles/{seed}/{i}',
+            'Final Level 1 Consensus': level_1,
+            'Exclusion Reason Final Level 1': 'Not relevant to screening' if level_1 == 'Exclude' else '',
+            'Final Level 2 Consensus': level_2,
+            'Exclusion Reason Final Level 2': 'Wrong population' if level_2 == 'Exclude' else '',
+            'Title': ' '.join(rng.choice(WORDS) for _ in range(rng.randint(6, 16))).capitalize() + f' ({i})',
+            'Theme': rng.choice(THEMES),
+            'Research Paper Type': rng.choice(PAPER_TYPES),
+            'Country/ Organisation': rng.choice(COUNTRIES),
+        }
@@ -0,0 +1,89 @@
+from django.test import SimpleTestCase
+from app.query_parser import parse_query, to_fts5, to_tsquery
+
+def term(word, prefix=False):
+    return ('term', word, prefix)
+
+class ParseQueryTests(SimpleTestCase):
+    def test_terms_next_to_each_other_are_anded(self):
+        self.assertEqual(parse_query('prostate screening'), ('and', [term('prostate'), term('screening')]))
+
+    def test_stopwords_are_dropped(self):
+        self.assertEqual(parse_query('the screening of cancer'), ('and', [term('screening'), term('cancer')]))
+
+    def test_phrases(self):
+        self.assertEqual(parse_query('"Student Engagement"'), ('phrase', ['student', 'engagement']))
+        # A quoted single word is a plain term
+        self.assertEqual(parse_query('"biopsy"'), term('biopsy'))
+        # A hyphenated word is matched as a phrase
+        self.assertEqual(parse_query('e-learning'), ('phrase', ['e', 'learning']))
+
+    def test_wildcards(self):
+        self.assertEqual(parse_query('child*'), term('child', True))
+        # Only the last token of a hyphenated wildcard is a prefix
+        self.assertEqual(parse_query('e-learn*'), ('and', [term('e'), term('learn', True)]))
+
+    def test_and_binds_tighter_than_or(self):
+        self.assertEqual(
+            parse_query('x y OR z'),
+            ('or', [('and', [term('x'), term('y')]), term('z')]),
+        )
+        self.assertEqual(
+            parse_query('x AND (y OR z)'),
+            ('and', [term('x'), ('or', [term('y'), term('z')])]),
+        )
+
+    def test_not_narrows_an_and_group(self):
+        expected = ('and', [term('screening'), ('not', term('children', True))])
+        self.assertEqual(parse_query('screening NOT children*'), expected)
+        self.assertEqual(parse_query('screening -children*'), expected)
+        self.assertEqual(
+            parse_query('screening -"active surveillance"'),
+            ('and', [term('screening'), ('not', ('phrase', ['active', 'surveillance']))]),
+        )
+
+    def test_double_negation_cancels_out(self):
+        self.assertEqual(parse_query('x NOT NOT y'), ('and', [term('x'), term('y')]))
+        self.assertEqual(parse_query('NOT NOT x'), term('x'))
+        self.assertEqual(parse_query('x NOT NOT NOT y'), ('and', [term('x'), ('not', term('y'))]))
+
+    def test_unanchored_negations_are_dropped(self):
+        self.assertEqual(parse_query('x OR NOT y'), term('x'))
+        self.assertEqual(parse_query('(x OR NOT y) AND z'), ('and', [term('x'), term('z')]))
+        self.assertIsNone(parse_query('NOT x'))
+        self.assertIsNone(parse_query('-x -y'))
+
+    def test_malformed_input(self):
+        self.assertIsNone(parse_query(''))
+        self.assertIsNone(parse_query(None))
+        self.assertIsNone(parse_query('AND OR NOT'))
+        self.assertIsNone(parse_query('()'))
+        self.assertEqual(parse_query('(x OR y'), ('or', [term('x'), term('y')]))
+        self.assertEqual(parse_query('x)) y'), ('and', [term('x'), term('y')]))
+        self.assertEqual(parse_query('x OR'), term('x'))
+        self.assertEqual(parse_query('x NOT'), term('x'))
+        self.assertEqual(parse_query('x -'), term('x'))
+        self.assertEqual(parse_query('"unterminated phrase'), ('phrase', ['unterminated', 'phrase']))
+
+class CompileTests(SimpleTestCase):
+    QUERY = 'online learning AND (education OR e-learning) AND "student engagement" NOT children*'
+
+    def test_tsquery(self):
+        self.assertEqual(
+            to_tsquery(parse_query(self.QUERY)),
+            "('online' & 'learning' & ('education' | ('e' <-> 'learning')) "
+            "& ('student' <-> 'engagement') & !'children':*)",
+        )
+
+    def test_fts5(self):
+        self.assertEqual(
+            to_fts5(parse_query(self.QUERY)),
+            '(("online" AND "learning" AND ("education" OR "e learning") '
+            'AND "student engagement") NOT "children"*)',
+        )
+
+    def test_both_backends_keep_the_same_negations(self):
+        for query in ('x OR NOT y', 'x NOT NOT y', '(x OR NOT y) AND z'):
+            node = parse_query(query)
+            self.assertNotIn('!', to_tsquery(node))
+            self.assertNotIn('NOT', to_fts5(node))
@@ -0,0 +1,59 @@
+import io
+import json
+from django.test import SimpleTestCase
+from app.streaming import iter_json_array
+
+DOCUMENT = json.dumps([
+    {'Title': 'Say "screening" \\ twice', 'URL': 'https://example.org/?q=[1]&r={2}'},
+    {'Title': 'Brackets ] and [ and , inside', 'Notes': '}{"],["'},
+    {'Title': 'Unicode: café – 前列腺', 'Year': 2023, 'Score': -12.5e-3, 'Flags': [True, False, None]},
+    {'Nested': {'a': [1, [2, [3]]], 'b': {}}, 'Empty': [], 'Text': ''},
+    123456789,
+    'a plain string with \\"escapes\\" and \\\\ backslashes',
+], ensure_ascii=False, indent=1)
+
+def parse(text, chunk_size):
+    return list(iter_json_array(io.StringIO(text), chunk_size=chunk_size))
+
+class IterJsonArrayTests(SimpleTestCase):
+    def test_matches_json_loads_at_every_chunk_size(self):
+        # Chunk boundaries fall inside strings, escapes, numbers and literals
+        expected = json.loads(DOCUMENT)
+        for chunk_size in range(1, len(DOCUMENT) + 2):
+            with self.subTest(chunk_size=chunk_size):
+                self.assertEqual(parse(DOCUMENT, chunk_size), expected)
+
+    def test_escaped_quotes_and_brackets_inside_strings(self):
+        text = r'["a\"]", "b\\", "[\",\"]", "]"]'
+        for chunk_size in (1, 2, 3, 5, 64):
+            with self.subTest(chunk_size=chunk_size):
+                self.assertEqual(parse(text, chunk_size), json.loads(text))
+
+    def test_numbers_split_across_chunks(self):
+        text = '[1234567890, -0.000123, 6.02e23, 7]'
+        for chunk_size in range(1, 12):
+            with self.subTest(chunk_size=chunk_size):
+                self.assertEqual(parse(text, chunk_size), [1234567890, -0.000123, 6.02e23, 7])
+
+    def test_empty_arrays_and_whitespace(self):
+        for text in ('[]', '  [ ]  ', '\n[\n\t]\n'):
+            with self.subTest(text=text):
+                self.assertEqual(parse(text, 1), [])
+        self.assertEqual(parse(' [ 1 ,\n 2 ] ', 1), [1, 2])
+
+    def test_truncated_input_raises(self):
+        # Every strict prefix of the document is cut off somewhere
+        for end in range(len(DOCUMENT)):
+            with self.subTest(end=end):
+                with self.assertRaises(json.JSONDecodeError):
+                    parse(DOCUMENT[:end], 7)
+
+    def test_not_an_array_raises(self):
+        for text in ('{"a": 1}', '"text"', '', '   '):
+            with self.subTest(text=text):
+                with self.assertRaises(json.JSONDecodeError):
+                    parse(text, 4)
+
+    def test_missing_delimiter_raises(self):
+        with self.assertRaises(json.JSONDecodeError):
+            parse('[1 2]', 64)
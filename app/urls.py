@@ -3,4 +3,18 @@ from . import views
 
 urlpatterns = [
     path('store-json/', views.store_json_from_file, name='store_json'),
+    path('store-xlsx/', views.store_xlsx_from_file, name='store_xlsx'),
+    path('jobs/<int:job_id>/', views.import_job_status, name='import_job_status'),
+    path('articles/', views.article_list, name='article_list'),
+    path('articles/export/', views.article_export, name='article_export'),
+    path('articles/search/', views.article_search, name='article_search'),
+    path('articles/similar/', views.article_similar, name='article_similar'),
+    path('articles/facets/', views.article_facets, name='article_facets'),
+    path('async/articles/', views.article_list_async, name='article_list_async'),
+    path('async/articles/search/', views.article_search_async, name='article_search_async'),
+    path('async/articles/similar/', views.article_similar_async, name='article_similar_async'),
+    path('async/articles/facets/', views.article_facets_async, name='article_facets_async'),
+    path('metrics/', views.metrics, name='metrics'),
+    path('llm/refine/', views.refine_query, name='refine_query'),
+    path('llm/refine/stream/', views.refine_query_stream, name='refine_query_stream'),
 ]
\ No newline at end of file
@@ -0,0 +1,299 @@
+import json
+import logging
+import math
+import os
+import shutil
+import zlib
+from collections import Counter
+from contextlib import contextmanager
+from django.conf import settings
+from .models import Article
+from .normalize import normalize_title
+
+# NumPy is only needed for similarity search; without it indexing is skipped
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Writers are serialized with flock where it exists (not on Windows)
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DIM = 512
+SEARCH_CHUNK_ROWS = 65536
+
+def _features(title):
+    # Words, word bigrams and character 4-grams of each word ("#word#" padded),
+    # so near spellings and shared word stems still overlap
+    words = normalize_title(title).split()
+    features = [f'w:{word}' for word in words]
+    features += [f'b:{first} {second}' for first, second in zip(words, words[1:])]
+    for word in words:
+        padded = f'#{word}#'
+        features += [f'c:{padded[i:i + 4]}' for i in range(max(1, len(padded) - 3))]
+    return features
+
+def embed(title, dim):
+    """
+    Hashed bag-of-n-grams vector for a title: each feature is hashed into one
+    of dim buckets with a hash-derived sign, weighted by 1 + log(tf) and the
+    vector is L2-normalized. Purely local and deterministic across processes.
+    """
+    vector = np.zeros(dim, dtype=np.float32)
+    for feature, count in Counter(_features(title)).items():
+        digest = zlib.crc32(feature.encode('utf-8'))
+        sign = 1.0 if digest & 0x80000000 else -1.0
+        vector[digest % dim] += sign * (1.0 + math.log(count))
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+class VectorIndex:
+    """
+    Title vectors for every Article, stored in index_dir as a memory-mapped
+    float32 matrix (vectors.npy) with the matching article ids (ids.npy) and
+    per-bucket document frequencies (df.npy) used to weight queries. New
+    articles are appended in place; the files grow by doubling. Deleted
+    articles keep their row, filled with NaN so searches skip it. Writers
+    must hold locked(), which also reloads what other processes wrote.
+    """
+
+    def __init__(self, index_dir, dim=DEFAULT_DIM):
+        self.index_dir = index_dir
+        self.meta_path = os.path.join(index_dir, 'meta.json')
+        self.vectors_path = os.path.join(index_dir, 'vectors.npy')
+        self.ids_path = os.path.join(index_dir, 'ids.npy')
+        self.df_path = os.path.join(index_dir, 'df.npy')
+        # Next to the directory, so it survives a rebuild removing it
+        self.lock_path = f'{os.path.normpath(index_dir)}.lock'
+        self.dim = dim
+        self._reset()
+        if os.path.exists(self.meta_path):
+            self._load()
+
+    def _reset(self):
+        self.count = 0
+        # Rows of deleted articles
+        self.removed = 0
+        self.vectors = None
+        self.ids = None
+        self.df = None
+        # Whether ids only ever grew, so the id -> row lookup needs no sort
+        self.ordered = True
+        self._lookup = None
+
+    def _load(self):
+        with open(self.meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        self.dim = meta['dim']
+        self.count = meta['count']
+        self.vectors = np.load(self.vectors_path, mmap_mode='r+')
+        self.ids = np.load(self.ids_path, mmap_mode='r+')
+        self.df = np.load(self.df_path)
+        self.ordered = meta.get('ordered', False)
+        self.removed = meta.get('removed', 0)
+        self._lookup = None
+
+    @contextmanager
+    def locked(self, rebuild=False):
+        """
+        Hold an exclusive lock on the index across processes while adding
+        to it, starting from the state last saved by any of them. With
+        rebuild=True the files are removed and the index starts empty.
+        """
+        os.makedirs(os.path.dirname(self.lock_path) or '.', exist_ok=True)
+        with open(self.lock_path, 'a') as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                if rebuild:
+                    shutil.rmtree(self.index_dir, ignore_errors=True)
+                self._reset()
+                if os.path.exists(self.meta_path):
+                    self._load()
+                yield self
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _save_meta(self):
+        self.vectors.flush()
+        self.ids.flush()
+        # Readers load without the lock, so whole files are swapped in
+        with open(f'{self.df_path}.tmp', 'wb') as f:
+            np.save(f, self.df)
+        os.replace(f'{self.df_path}.tmp', self.df_path)
+        tmp_path = f'{self.meta_path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'dim': self.dim, 'count': self.count, 'ordered': self.ordered, 'removed': self.removed}, f)
+        # meta.json is written last, so readers never see rows that aren't there yet
+        os.replace(tmp_path, self.meta_path)
+
+    def _allocate(self, capacity):
+        # Create (or grow) the memory-mapped files to hold capacity rows
+        os.makedirs(self.index_dir, exist_ok=True)
+        vectors = np.lib.format.open_memmap(f'{self.vectors_path}.tmp', mode='w+', dtype=np.float32,
+                                            shape=(capacity, self.dim))
+        ids = np.lib.format.open_memmap(f'{self.ids_path}.tmp', mode='w+', dtype=np.int64, shape=(capacity,))
+        if self.count:
+            vectors[:self.count] = self.vectors[:self.count]
+            ids[:self.count] = self.ids[:self.count]
+        vectors.flush()
+        ids.flush()
+        del vectors, ids
+        os.replace(f'{self.vectors_path}.tmp', self.vectors_path)
+        os.replace(f'{self.ids_path}.tmp', self.ids_path)
+        self.vectors = np.load(self.vectors_path, mmap_mode='r+')
+        self.ids = np.load(self.ids_path, mmap_mode='r+')
+        self._lookup = None
+        if self.df is None:
+            self.df = np.zeros(self.dim, dtype=np.float64)
+
+    def max_id(self):
+        if not self.count:
+            return 0
+        return int(self.ids[self.count - 1]) if self.ordered else int(self.ids[:self.count].max())
+
+    def _row_of(self, pk):
+        """
+        Row of an indexed id, or None. Ids are appended in increasing order,
+        so they are binary searched in place; only an index that once got an
+        id out of order is argsorted, once per add().
+        """
+        if self._lookup is None:
+            ids = self.ids[:self.count]
+            order = None if self.ordered else np.argsort(ids, kind='stable')
+            self._lookup = (order, ids if order is None else ids[order], self.count)
+        order, keys, covered = self._lookup
+        i = int(np.searchsorted(keys, pk))
+        if i < covered and keys[i] == pk:
+            return i if order is None else int(order[i])
+        # Rows appended after the lookup was built
+        appended = np.flatnonzero(self.ids[covered:self.count] == pk)
+        return covered + int(appended[0]) if len(appended) else None
+
+    def add(self, articles):
+        """
+        Embed an iterable of (id, title) pairs. Ids not in the index are
+        appended; an id that is already indexed has its row overwritten.
+        """
+        indexed_max = self.max_id()
+        added = 0
+        for pk, title in articles:
+            # Only ids that may already be indexed need the id -> row lookup
+            row = self._row_of(pk) if pk <= indexed_max else None
+            if row is None:
+                capacity = self.vectors.shape[0] if self.vectors is not None else 0
+                if self.count >= capacity:
+                    self._allocate(max(capacity * 2, 1024))
+                row = self.count
+                self.count += 1
+                if pk <= indexed_max:
+                    self.ordered = False
+                indexed_max = max(indexed_max, pk)
+            elif np.isnan(self.vectors[row, 0]):
+                # A removed article that is back
+                self.removed -= 1
+            else:
+                self.df -= self.vectors[row] != 0
+
+            vector = embed(title, self.dim)
+            self.vectors[row] = vector
+            self.ids[row] = pk
+            self.df += vector != 0
+            added += 1
+
+        if added:
+            self._save_meta()
+        return added
+
+    def remove(self, ids):
+        # Tombstone the rows of deleted articles; returns how many were indexed
+        indexed_max = self.max_id()
+        removed = 0
+        for pk in ids:
+            row = self._row_of(pk) if pk <= indexed_max else None
+            if row is None or np.isnan(self.vectors[row, 0]):
+                continue
+            self.df -= self.vectors[row] != 0
+            self.vectors[row] = np.nan
+            removed += 1
+        if removed:
+            self.removed += removed
+            self._save_meta()
+        return removed
+
+    def search(self, vector, k):
+        """
+        Return up to k (article id, score) pairs, best first. The query is
+        weighted by inverse document frequency and scored against every row
+        with a dot product, one chunk of the memory map at a time.
+        """
+        if not self.count:
+            return []
+        idf = np.log((1 + self.count - self.removed) / (1 + self.df)).astype(np.float32) + 1.0
+        query = vector * idf
+        norm = np.linalg.norm(query)
+        if not norm:
+            return []
+        query /= norm
+
+        best_scores = np.empty(0, dtype=np.float32)
+        best_ids = np.empty(0, dtype=np.int64)
+        for start in range(0, self.count, SEARCH_CHUNK_ROWS):
+            stop = min(start + SEARCH_CHUNK_ROWS, self.count)
+            scores = self.vectors[start:stop] @ query
+            scores[np.isnan(scores)] = -np.inf
+            best_scores = np.concatenate([best_scores, scores])
+            best_ids = np.concatenate([best_ids, self.ids[start:stop]])
+            if len(best_scores) > k:
+                top = np.argpartition(-best_scores, k)[:k]
+                best_scores, best_ids = best_scores[top], best_ids[top]
+        order = np.argsort(-best_scores)
+        return [(int(best_ids[i]), float(best_scores[i])) for i in order if best_scores[i] > -np.inf]
+
+def get_index():
+    return VectorIndex(settings.VECTOR_INDEX_DIR, dim=getattr(settings, 'VECTOR_DIM', DEFAULT_DIM))
+
+def update_vector_index(updated_ids=()):
+    """
+    Bring the index up to date after an import: embed every article newer
+    than the last indexed id, plus the ids whose title may have changed.
+    Only the changed articles are vectorized, never the whole corpus.
+    """
+    if np is None:
+        return 0
+    try:
+        index = get_index()
+        with index.locked():
+            queryset = Article.objects.filter(id__gt=index.max_id())
+            if updated_ids:
+                queryset = queryset | Article.objects.filter(id__in=list(updated_ids))
+            return index.add(queryset.order_by('id').values_list('id', 'title').iterator(chunk_size=2000))
+    except Exception:
+        # A stale index only degrades similarity search, so never fail the import
+        logger.exception('Updating the vector index failed')
+        return 0
+
+def remove_from_vector_index(ids):
+    # Tombstone deleted articles, so similarity search still returns k live ones
+    if np is None or not ids:
+        return 0
+    try:
+        index = get_index()
+        with index.locked():
+            return index.remove(ids)
+    except Exception:
+        logger.exception('Removing articles from the vector index failed')
+        return 0
+
+def similar_articles(text, k=10):
+    # (article id, score) pairs for the titles most similar to text
+    if np is None:
+        raise ImportError('numpy is required for similarity search')
+    index = get_index()
+    return index.search(embed(text, index.dim), k)
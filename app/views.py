@@ -1,57 +1,443 @@
+import asyncio
 import json
 import os
+from functools import wraps
+from asgiref.sync import sync_to_async
 from django.conf import settings
-from django.http import JsonResponse
-from .models import JSONData, Article
-from datetime import datetime
+from django.http import HttpResponse, HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse
+from django.middleware.gzip import GZipMiddleware
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import condition, require_GET
+from .dataset import dataset_etag, dataset_last_modified, get_dataset_version
+from .models import Article, ImportJob
+from .export import DEFAULT_CHUNK_SIZE, EXPORT_FORMATS
+from .facets import facet_cache_stats, get_facets
+from .ingestion import DEFAULT_BATCH_SIZE, ingest_articles
+from .jobs import enqueue_import, inline_import, job_progress, job_status, snapshot_name
+from .metrics import render as render_metrics
+from .queries import akeyset_page, filter_articles, keyset_page, parse_fields, parse_limit
+from .search import boolean_search, search_articles
+from .snapshots import import_snapshot
+from .streaming import iter_json_array, iter_xlsx_rows
+from .vectors import similar_articles
+
+def get_batch_size(request):
+    # Optional ?batch_size= override, defaults to the ingestion engine's batch size
+    value = request.GET.get('batch_size', DEFAULT_BATCH_SIZE)
+    try:
+        batch_size = int(value)
+    except (TypeError, ValueError):
+        batch_size = 0
+    if batch_size < 1:
+        raise ValueError(f'Invalid batch_size: {value}')
+    return batch_size
+
+# Read endpoints only change when the Article data does: repeat requests are
+# answered with 304 Not Modified from the dataset version alone, without
+# running the view, and large bodies are gzip compressed
+conditional_read = condition(etag_func=dataset_etag, last_modified_func=dataset_last_modified)
+
+def ingestion_response(label, stats, **extra):
+    return JsonResponse({
+        'message': (
+            f'{label} processed successfully. Created {stats["articles_created"]}, '
+            f'updated {stats["articles_updated"]}, removed {stats.get("articles_removed", 0)} '
+            f'and left {stats["articles_unchanged"]} articles unchanged.'
+        ),
+        **extra,
+        **stats,
+    })
+
+def job_links(job):
+    return {
+        'job_id': job.id,
+        'status': job.status,
+        'status_url': reverse('import_job_status', args=[job.id]),
+    }
+
+def import_conflict(label, job):
+    return JsonResponse({'error': f'An import of this {label} is already {job.status}', **job_links(job)}, status=409)
+
+def queue_import(label, kind, file_path, **options):
+    # Queue the import for the run_import_jobs worker and point at its status
+    job, created = enqueue_import(kind, file_path, **options)
+    if not created:
+        return import_conflict(label, job)
+    return JsonResponse({'message': f'{label} import queued', **job_links(job)}, status=202)
 
 def store_json_from_file(request):
     # Get the path to the JSON file in the project root
     file_path = os.path.join(settings.BASE_DIR, 'tableConvert.com_2yj0vs.json')
-   
-    try:
-        # Read JSON file with UTF-8 encoding
-        with open(file_path, 'r', encoding='utf-8') as json_file:
-            data = json.load(json_file)
-       
-        # Count of articles created
-        count = 0
-        
-        # Create individual Article objects for each entry
-        for article_data in data:
-            # Handle date format conversion if the date is provided
-            date_access = None
-            if article_data.get('Date Access'):
-                try:
-                    date_access = datetime.strptime(article_data['Date Access'], '%Y-%m-%d %H:%M:%S')
-                except ValueError:
-                    # Keep as None if date format is invalid
-                    pass
-            
-            # Create a new Article object
-            article = Article.objects.create(
-                source=article_data.get('Source', ''),
-                type=article_data.get('Type', ''),
-                date_access=date_access,
-                url=article_data.get('URL', ''),
-                final_level_1_consensus=article_data.get('Final Level 1 Consensus', ''),
-                exclusion_reason_final_level_1=article_data.get('Exclusion Reason Final Level 1', ''),
-                final_level_2_consensus=article_data.get('Final Level 2 Consensus', ''),
-                exclusion_reason_final_level_2=article_data.get('Exclusion Reason Final Level 2', ''),
-                title=article_data.get('Title', ''),
-                theme=article_data.get('Theme', ''),
-                research_paper_type=article_data.get('Research Paper Type', ''),
-                country_organisation=article_data.get('Country/ Organisation', '')
-            )
-            count += 1
-       
-        return JsonResponse({
-            'message': f'JSON file processed successfully. Created {count} articles.',
-            'articles_created': count
-        })
+
+    try:
+        batch_size = get_batch_size(request)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    stream = request.GET.get('stream') in ('1', 'true')
+    # ?full=1 upserts every row instead of only those changed since the last snapshot
+    full = request.GET.get('full') in ('1', 'true')
+
+    # Imports run in the background unless ?sync=1 asks to wait for the result
+    if request.GET.get('sync') not in ('1', 'true'):
+        if not os.path.exists(file_path):
+            return JsonResponse({'error': f'JSON file not found: {file_path}'}, status=404)
+        return queue_import('JSON file', 'json', file_path, batch_size=batch_size, stream=stream, full=full)
+
+    try:
+        # Recorded as a running job, so it can't overlap a queued import of the file
+        with inline_import('json', file_path, batch_size=batch_size, stream=stream, full=full) as (job, created):
+            if not created:
+                return import_conflict('JSON file', job)
+            # Batches commit on their own with the job's heartbeat, as in
+            # queued imports, so a long import keeps its lock
+            progress = job_progress(job)
+            # Read JSON file with UTF-8 encoding
+            with open(file_path, 'r', encoding='utf-8') as json_file:
+                if stream:
+                    # Parse the top-level array incrementally so memory stays
+                    # bounded by the batch size rather than the file size; no
+                    # snapshot is kept
+                    stats = ingest_articles(iter_json_array(json_file), batch_size=batch_size,
+                                            atomic=False, progress=progress)
+                else:
+                    # Insert only what changed since the last snapshot, in batches
+                    stats = import_snapshot(snapshot_name(file_path), json.load(json_file), batch_size=batch_size,
+                                            full=full, atomic=False, progress=progress)
+            job.stats = stats
+
+        return ingestion_response('JSON file', stats, streamed=stream, **job_links(job))
     except FileNotFoundError:
         return JsonResponse({'error': f'JSON file not found: {file_path}'}, status=404)
     except json.JSONDecodeError:
         return JsonResponse({'error': 'Invalid JSON format'}, status=400)
     except Exception as e:
-        return JsonResponse({'error': f'Error processing file: {str(e)}'}, status=500)
\ No newline at end of file
+        return JsonResponse({'error': f'Error processing file: {str(e)}'}, status=500)
+
+def store_xlsx_from_file(request):
+    # Get the path to the Excel workbook in the project root
+    file_path = os.path.join(settings.BASE_DIR, 'cleaned_dataset.xlsx')
+
+    try:
+        batch_size = get_batch_size(request)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    full = request.GET.get('full') in ('1', 'true')
+
+    if request.GET.get('sync') not in ('1', 'true'):
+        if not os.path.exists(file_path):
+            return JsonResponse({'error': f'Excel file not found: {file_path}'}, status=404)
+        return queue_import('Excel file', 'xlsx', file_path, batch_size=batch_size, full=full)
+
+    try:
+        with inline_import('xlsx', file_path, batch_size=batch_size, full=full) as (job, created):
+            if not created:
+                return import_conflict('Excel file', job)
+            # Rows are diffed against the workbook's last snapshot, then only the changes
+            # written, each batch committing with the job's heartbeat
+            stats = import_snapshot(snapshot_name(file_path), iter_xlsx_rows(file_path), batch_size=batch_size,
+                                    full=full, atomic=False, progress=job_progress(job))
+            job.stats = stats
+        return ingestion_response('Excel file', stats, **job_links(job))
+    except FileNotFoundError:
+        return JsonResponse({'error': f'Excel file not found: {file_path}'}, status=404)
+    except ImportError:
+        return JsonResponse({'error': 'openpyxl is required to import Excel files'}, status=500)
+    except Exception as e:
+        return JsonResponse({'error': f'Error processing file: {str(e)}'}, status=500)
+
+@require_GET
+def import_job_status(request, job_id):
+    # Progress of a queued import: rows done, rows/sec and an ETA while it runs
+    try:
+        job = ImportJob.objects.get(pk=job_id)
+    except ImportJob.DoesNotExist:
+        return JsonResponse({'error': f'Import job not found: {job_id}'}, status=404)
+    return JsonResponse(job_status(job))
+
+# The read endpoints come in a sync and an async flavour (under async/) with
+# the same parameters and responses; these helpers hold everything but the
+# queries, which each flavour runs its own way. Bad parameters raise
+# ValueError, answered with 400.
+
+def list_params(request):
+    # (fields, limit, queryset) of articles/
+    fields = parse_fields(request.GET.get('fields'))
+    limit = parse_limit(request.GET.get('limit'))
+    return fields, limit, filter_articles(Article.objects.all(), request.GET)
+
+def list_response(results, next_cursor):
+    return JsonResponse({
+        'count': len(results),
+        'next_cursor': next_cursor,
+        'results': results,
+    })
+
+def search_params(request):
+    # (query, syntax, limit, ranked values queryset) of articles/search/
+    query = request.GET.get('q', '').strip()
+    if not query:
+        raise ValueError('Missing search query: q')
+    fields, limit, queryset = list_params(request)
+    syntax = request.GET.get('syntax', 'plain')
+    if syntax not in ('plain', 'boolean'):
+        raise ValueError(f'Invalid syntax: {syntax}')
+    search = boolean_search if syntax == 'boolean' else search_articles
+    return query, syntax, limit, search(queryset, query).values(*fields, 'rank')
+
+def search_response(query, syntax, results):
+    return JsonResponse({
+        'query': query,
+        'syntax': syntax,
+        'count': len(results),
+        'results': results,
+    })
+
+def similar_params(request):
+    # (fields, k, query, source_id) of articles/similar/; with ?id= the
+    # query is empty until the view has looked up that article's title
+    fields = parse_fields(request.GET.get('fields'))
+    k = parse_limit(request.GET.get('k'), default=10)
+    query = request.GET.get('q', '').strip()
+    source_id = None
+    if not query:
+        if not request.GET.get('id'):
+            raise ValueError('Missing search query: q or id')
+        try:
+            source_id = int(request.GET['id'])
+        except ValueError:
+            raise ValueError(f'Invalid id: {request.GET["id"]}')
+    return fields, k, query, source_id
+
+def similar_rows(matches, fields):
+    # Articles deleted since they were indexed are left out by the query
+    return Article.objects.filter(id__in=[pk for pk, _ in matches]).values('id', *fields)
+
+def similar_response(query, matches, rows, fields, k, source_id):
+    articles = {row['id']: row for row in rows}
+    results = [
+        {**{field: articles[pk][field] for field in fields}, 'score': round(score, 4)}
+        for pk, score in matches
+        if pk in articles and pk != source_id
+    ][:k]
+    return JsonResponse({
+        'query': query,
+        'count': len(results),
+        'results': results,
+    })
+
+@require_GET
+@gzip_page
+@conditional_read
+def article_list(request):
+    # Filtered list of articles, newest first, paginated with ?cursor=
+    try:
+        fields, limit, queryset = list_params(request)
+        results, next_cursor = keyset_page(queryset, fields, limit, request.GET.get('cursor'))
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return list_response(results, next_cursor)
+
+@require_GET
+@gzip_page
+@conditional_read
+def article_export(request):
+    # Every article matching the list filters as a CSV or JSONL download,
+    # streamed chunk by chunk (?format=csv|jsonl, ?fields=, ?chunk_size=)
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return JsonResponse({'error': f'Invalid format: {export_format}'}, status=400)
+    try:
+        fields = parse_fields(request.GET.get('fields'))
+        chunk_size = parse_limit(request.GET.get('chunk_size'), default=DEFAULT_CHUNK_SIZE, maximum=10000)
+        queryset = filter_articles(Article.objects.all(), request.GET)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    write_rows, content_type, extension = EXPORT_FORMATS[export_format]
+    response = StreamingHttpResponse(write_rows(queryset, fields, chunk_size), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="articles.{extension}"'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+@require_GET
+@gzip_page
+@conditional_read
+def article_search(request):
+    # Ranked full-text search over titles and exclusion reasons, best match first.
+    # ?syntax=boolean accepts AND/OR/NOT, "phrases" and * wildcards, the
+    # syntax of a generated refined_query
+    try:
+        query, syntax, limit, queryset = search_params(request)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return search_response(query, syntax, list(queryset[:limit]))
+
+@require_GET
+@gzip_page
+@conditional_read
+def article_similar(request):
+    # Articles whose titles are closest to ?q= (or to the title of article ?id=),
+    # scored by cosine similarity of the local title vectors
+    try:
+        fields, k, query, source_id = similar_params(request)
+        if source_id is not None:
+            query = Article.objects.values_list('title', flat=True).get(pk=source_id)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    except Article.DoesNotExist:
+        return JsonResponse({'error': f'Invalid id: {source_id}'}, status=400)
+
+    try:
+        # One extra match, as the source article itself is left out
+        matches = similar_articles(query, k + 1)
+    except ImportError as e:
+        return JsonResponse({'error': str(e)}, status=500)
+    return similar_response(query, matches, similar_rows(matches, fields), fields, k, source_id)
+
+@require_GET
+@gzip_page
+@conditional_read
+def article_facets(request):
+    # Article counts by theme, source, type and Level 1/Level 2 consensus
+    facets, hit = get_facets()
+    return JsonResponse({
+        'facets': facets,
+        'cache': {'hit': hit, **facet_cache_stats()},
+    })
+
+def async_read(view):
+    """
+    require_GET, gzip_page and conditional_read for async views, as those
+    decorators only wrap sync views in Django 4.2.
+    """
+    gzip = GZipMiddleware(lambda request: None)
+
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return HttpResponseNotAllowed(['GET', 'HEAD'])
+        version, last_modified = await sync_to_async(get_dataset_version)()
+        etag = quote_etag(str(version))
+        response = get_conditional_response(request, etag=etag, last_modified=int(last_modified.timestamp()))
+        if response is None:
+            response = await view(request, *args, **kwargs)
+        # Like condition(), on every response and not only on a 200
+        if not response.has_header('Last-Modified'):
+            response.headers['Last-Modified'] = http_date(last_modified.timestamp())
+        response.headers.setdefault('ETag', etag)
+        return gzip.process_response(request, response)
+
+    return wrapper
+
+# Async variants of the read endpoints under async/. Django 4.2's async ORM
+# still runs each query through sync_to_async, in the single thread that
+# thread-sensitive calls share, so a request waiting on the database holds
+# that thread all the same; these views only free the event loop while the
+# vector search runs in a thread of its own
+
+@async_read
+async def article_list_async(request):
+    try:
+        fields, limit, queryset = list_params(request)
+        results, next_cursor = await akeyset_page(queryset, fields, limit, request.GET.get('cursor'))
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return list_response(results, next_cursor)
+
+@async_read
+async def article_search_async(request):
+    try:
+        query, syntax, limit, queryset = search_params(request)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return search_response(query, syntax, [row async for row in queryset[:limit]])
+
+@async_read
+async def article_similar_async(request):
+    try:
+        fields, k, query, source_id = similar_params(request)
+        if source_id is not None:
+            query = await Article.objects.values_list('title', flat=True).aget(pk=source_id)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    except Article.DoesNotExist:
+        return JsonResponse({'error': f'Invalid id: {source_id}'}, status=400)
+
+    try:
+        # The vector search is CPU work on a memory-mapped file, so it runs in a thread
+        matches = await sync_to_async(similar_articles, thread_sensitive=False)(query, k + 1)
+    except ImportError as e:
+        return JsonResponse({'error': str(e)}, status=500)
+    rows = [row async for row in similar_rows(matches, fields)]
+    return similar_response(query, matches, rows, fields, k, source_id)
+
+@async_read
+async def article_facets_async(request):
+    # Usually a cache hit; a miss runs the GROUP BYs in a thread
+    facets, hit = await sync_to_async(get_facets)()
+    stats = await sync_to_async(facet_cache_stats)()
+    return JsonResponse({
+        'facets': facets,
+        'cache': {'hit': hit, **stats},
+    })
+
+async def refine_query(request):
+    # Research query chain for ?topic= (and optionally ?template=) through the
+    # warm in-process service, see llm_service.LLMService. Identical requests
+    # arriving while one is running share its result. Serve through project.asgi.
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+    topic = request.GET.get('topic', '').strip()
+    if not topic:
+        return JsonResponse({'error': 'Missing topic'}, status=400)
+
+    # Imported here so the rest of the app doesn't load langchain on startup
+    from LLM import TEMPLATES
+    from .llm_service import get_service
+
+    template = request.GET.get('template') or None
+    if template is not None and template not in TEMPLATES:
+        return JsonResponse({'error': f'Unknown template: {template}'}, status=400)
+
+    service = get_service()
+    try:
+        result, outcome = await service.generate(topic, template)
+    except asyncio.TimeoutError:
+        return JsonResponse({'error': f'Timed out after {service.timeout}s'}, status=504)
+    except Exception as e:
+        return JsonResponse({'error': f'{type(e).__name__}: {e}'}, status=502)
+    return JsonResponse({
+        'topic': topic,
+        'template': template or service.template_name(topic),
+        'output_model': type(result).__name__,
+        'result': result.model_dump(),
+        'outcome': outcome,
+        'service': service.stats(),
+    })
+
+async def refine_query_stream(request):
+    # Server-sent events for the research query chain, see llm_stream.stream_refinement.
+    # Serve through project.asgi so the stream isn't buffered by a sync worker.
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Method not allowed'}, status=405)
+    topic = request.GET.get('topic', '').strip()
+    if not topic:
+        return JsonResponse({'error': 'Missing topic'}, status=400)
+
+    # Imported here so the rest of the app doesn't load langchain on startup
+    from .llm_stream import stream_refinement
+
+    response = StreamingHttpResponse(stream_refinement(topic), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+@require_GET
+def metrics(request):
+    # Request, database and LLM histograms of this process for Prometheus to scrape
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
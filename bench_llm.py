@@ -0,0 +1,164 @@
+"""
+Offline benchmark of the research query chain, using fake_ollama.FakeChatOllama
+in place of the Ollama daemon so results only reflect our own code and the
+langchain/Pydantic path in LLM.py.
+
+    python bench_llm.py                          # run and compare against the baseline
+    python bench_llm.py --save-baseline          # store this run as the new baseline
+    python bench_llm.py --fail-on-regression     # exit 1 if a metric got slower than --threshold
+
+Reported per template (short/medium/long):
+  - prompt_render_us: ChatPromptTemplate.from_template + formatting the messages
+  - schema_bind_us:   with_structured_output(method="json_schema") on the model
+  - parse_us:         parsing a model response into the output model
+  - chain_overhead_us: a full chain.ainvoke with a zero-latency model
+and, with the configured latency and token rate, throughput and p50/p95
+latency at each --concurrency level.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from langchain_core.messages import AIMessage
+from langchain_core.prompts import ChatPromptTemplate
+from fake_ollama import FakeChatOllama
+from llm_batch import percentile
+from LLM import MODEL_PARAMS, LongResearchQuery, MediumResearchQuery, ShortResearchQuery, build_chain
+from prompts import long_template, medium_template, short_template
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench_llm_baseline.json')
+
+# Topics of the length that makes select_template pick each template
+TEMPLATES = {
+    'short': (short_template, ShortResearchQuery, 'LLM'),
+    'medium': (medium_template, MediumResearchQuery, 'AI in medicine research papers'),
+    'long': (
+        long_template,
+        LongResearchQuery,
+        'I need peer reviewed research papers about the effect of AI on the early diagnosis of prostate cancer',
+    ),
+}
+
+def median_us(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1e6)
+    return statistics.median(timings)
+
+async def amedian_us(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await func()
+        timings.append((time.perf_counter() - started) * 1e6)
+    return statistics.median(timings)
+
+def stage_overheads(repeat):
+    # Time each stage of the chain separately, with no model latency at all
+    results = {}
+    model = FakeChatOllama(**MODEL_PARAMS)
+    for name, (template, output_model, topic) in TEMPLATES.items():
+        results[f'{name}.prompt_render_us'] = median_us(
+            lambda: ChatPromptTemplate.from_template(template).invoke({'topic': topic}), repeat
+        )
+        results[f'{name}.schema_bind_us'] = median_us(
+            lambda: model.with_structured_output(output_model, method='json_schema'), repeat
+        )
+
+        # The parser is the last step of the structured-output runnable
+        parser = model.with_structured_output(output_model, method='json_schema').last
+        prompt_value = ChatPromptTemplate.from_template(template).invoke({'topic': topic})
+        response = model.bind(format=output_model.model_json_schema()).invoke(prompt_value)
+        message = AIMessage(content=response.content)
+        results[f'{name}.parse_us'] = median_us(lambda: parser.invoke(message), repeat)
+
+        chain = build_chain(template, output_model, MODEL_PARAMS, FakeChatOllama)
+        results[f'{name}.chain_overhead_us'] = asyncio.run(
+            amedian_us(lambda: chain.ainvoke({'topic': topic}), repeat)
+        )
+    return results
+
+async def concurrency_run(concurrency, requests, latency, tokens_per_sec):
+    # Fire `requests` chain calls with at most `concurrency` in flight
+    model_params = {**MODEL_PARAMS, 'latency': latency, 'tokens_per_sec': tokens_per_sec}
+    chains = [
+        (build_chain(template, output_model, model_params, FakeChatOllama), topic)
+        for template, output_model, topic in TEMPLATES.values()
+    ]
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i):
+        chain, topic = chains[i % len(chains)]
+        async with semaphore:
+            started = time.perf_counter()
+            await chain.ainvoke({'topic': f'{topic} {i}'})
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - started
+    return {
+        f'c{concurrency}.requests_per_sec': requests / elapsed,
+        f'c{concurrency}.latency_p50_ms': percentile(latencies, 50) * 1000,
+        f'c{concurrency}.latency_p95_ms': percentile(latencies, 95) * 1000,
+    }
+
+def compare(results, baseline, threshold):
+    # Print every metric with its change against the baseline; return the regressions
+    regressions = []
+    print(f'{"metric":<34} {"value":>12} {"baseline":>12} {"delta":>8}')
+    for key, value in results.items():
+        base = baseline.get(key)
+        if base:
+            delta = (value - base) / base * 100
+            # Higher is better only for throughput
+            worse = -delta if key.endswith('requests_per_sec') else delta
+            flag = '  REGRESSION' if worse > threshold else ''
+            if flag:
+                regressions.append(key)
+            print(f'{key:<34} {value:>12.1f} {base:>12.1f} {delta:>+7.1f}%{flag}')
+        else:
+            print(f'{key:<34} {value:>12.1f} {"-":>12} {"-":>8}')
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline benchmark of the LLM.py chain with a fake Ollama model.')
+    parser.add_argument('--repeat', type=int, default=50, help='Runs per stage timing; the median is reported')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--requests', type=int, default=96, help='Chain calls per concurrency level')
+    parser.add_argument('--latency', type=float, default=0.05, help='Fake model time to first token, in seconds')
+    parser.add_argument('--tokens-per-sec', type=float, default=500.0, help='Fake model generation speed')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help='Write this run to --baseline')
+    parser.add_argument('--threshold', type=float, default=20.0, help='Percent slowdown counted as a regression')
+    parser.add_argument('--fail-on-regression', action='store_true')
+    args = parser.parse_args()
+
+    results = stage_overheads(args.repeat)
+    for concurrency in args.concurrency:
+        results.update(asyncio.run(
+            concurrency_run(concurrency, args.requests, args.latency, args.tokens_per_sec)
+        ))
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    regressions = compare(results, baseline, args.threshold)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f'Saved baseline to {args.baseline}')
+    if regressions and args.fail_on_regression:
+        print(f'{len(regressions)} metric(s) regressed by more than {args.threshold}%')
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+import asyncio
+import hashlib
+import json
+import random
+import time
+from typing import Any, Optional
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_ollama import ChatOllama
+
+# Roughly how many characters make one token, used to size the fake output
+CHARS_PER_TOKEN = 4
+WORDS = (
+    'screening detection prostate cancer antigen guidelines cohort outcomes risk '
+    'review evidence population diagnosis imaging biopsy mortality recommendation'
+).split()
+
+def _fake_value(schema, defs, rng, name=''):
+    # Deterministic value matching a (simple) JSON schema
+    if '$ref' in schema:
+        return _fake_value(defs[schema['$ref'].split('/')[-1]], defs, rng, name)
+    if 'anyOf' in schema:
+        options = [option for option in schema['anyOf'] if option.get('type') != 'null']
+        return _fake_value(options[0], defs, rng, name) if options else None
+    kind = schema.get('type')
+    if kind == 'object':
+        return {
+            key: _fake_value(value, defs, rng, key)
+            for key, value in schema.get('properties', {}).items()
+        }
+    if kind == 'array':
+        return [_fake_value(schema.get('items', {}), defs, rng, name) for _ in range(rng.randint(2, 4))]
+    if kind in ('integer', 'number'):
+        return rng.randint(1, 100)
+    if kind == 'boolean':
+        return rng.random() < 0.5
+    words = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(3, 8)))
+    if 'query' in name:
+        # Something that looks like the boolean queries the prompts ask for
+        first, second = rng.sample(WORDS, 2)
+        return f'({first} OR {second}*) AND {rng.choice(WORDS)}'
+    return words
+
+def fake_response(prompt_text, schema=None):
+    """
+    Build the deterministic response text for a prompt: JSON matching schema
+    when one is given (as with structured output), plain text otherwise.
+    """
+    seed = int(hashlib.sha256(prompt_text.encode('utf-8')).hexdigest()[:16], 16)
+    rng = random.Random(seed)
+    if isinstance(schema, dict):
+        return json.dumps(_fake_value(schema, schema.get('$defs', {}), rng))
+    return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(20, 60)))
+
+def split_tokens(text):
+    return [text[i:i + CHARS_PER_TOKEN] for i in range(0, len(text), CHARS_PER_TOKEN)]
+
+class FakeChatOllama(ChatOllama):
+    """
+    Local stand-in for ChatOllama that never contacts the Ollama daemon.
+    Everything except the HTTP call is the real ChatOllama, including
+    with_structured_output(method="json_schema"), so prompts, schema binding
+    and Pydantic parsing run exactly as in production. Responses are
+    deterministic for a given prompt and arrive after `latency` seconds plus
+    one token every 1 / tokens_per_sec seconds.
+    """
+
+    latency: float = 0.0
+    tokens_per_sec: Optional[float] = None
+
+    @property
+    def _llm_type(self) -> str:
+        return 'fake-ollama'
+
+    def _response(self, messages, kwargs):
+        prompt_text = '\n'.join(str(message.content) for message in messages)
+        text = fake_response(prompt_text, kwargs.get('format', self.format))
+        usage = {
+            'input_tokens': len(prompt_text) // CHARS_PER_TOKEN,
+            'output_tokens': len(split_tokens(text)),
+            'total_tokens': len(prompt_text) // CHARS_PER_TOKEN + len(split_tokens(text)),
+        }
+        return text, usage
+
+    def _token_delay(self):
+        return 1 / self.tokens_per_sec if self.tokens_per_sec else 0.0
+
+    def _result(self, text, usage):
+        message = AIMessage(content=text, usage_metadata=usage, response_metadata={'model': self.model})
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        text, usage = self._response(messages, kwargs)
+        time.sleep(self.latency + self._token_delay() * usage['output_tokens'])
+        return self._result(text, usage)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        text, usage = self._response(messages, kwargs)
+        await asyncio.sleep(self.latency + self._token_delay() * usage['output_tokens'])
+        return self._result(text, usage)
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs: Any):
+        text, usage = self._response(messages, kwargs)
+        time.sleep(self.latency)
+        for token in split_tokens(text):
+            time.sleep(self._token_delay())
+            if run_manager:
+                run_manager.on_llm_new_token(token)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+        yield ChatGenerationChunk(message=AIMessageChunk(content='', usage_metadata=usage))
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs: Any):
+        text, usage = self._response(messages, kwargs)
+        await asyncio.sleep(self.latency)
+        for token in split_tokens(text):
+            await asyncio.sleep(self._token_delay())
+            if run_manager:
+                await run_manager.on_llm_new_token(token)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+        yield ChatGenerationChunk(message=AIMessageChunk(content='', usage_metadata=usage))
@@ -0,0 +1,167 @@
+"""
+Generate refined research queries for many topics at once.
+
+    python llm_batch.py topics.jsonl results.jsonl --concurrency 4 --timeout 60 --retries 2
+
+Each input line is a JSON object with a "topic" key (or a bare JSON string).
+Results are appended to the output file as soon as each topic finishes, so
+re-running the same command after a crash only processes the topics that
+don't have a successful result yet.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import time
+from LLM import MODEL_PARAMS, generate
+from llm_cache import LLMResponseCache
+
+def percentile(values, q):
+    # Nearest-rank percentile (q in 0-100) of a list of numbers
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(q / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+def read_topics(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            topic = item if isinstance(item, str) else item.get('topic')
+            if topic:
+                yield topic
+
+def completed_topics(path):
+    # Topics that already have a successful result in the output file
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A line cut short by a crash mid-write
+                continue
+            if record.get('status') == 'ok':
+                done.add(record['topic'])
+    return done
+
+async def run_topic(topic, generate_fn, timeout, retries, backoff):
+    # Generate one topic, retrying failures and timeouts with exponential backoff
+    started = time.perf_counter()
+    error = None
+    for attempt in range(1, retries + 2):
+        try:
+            result = await asyncio.wait_for(generate_fn(topic), timeout)
+            return {
+                'topic': topic,
+                'status': 'ok',
+                'output_model': type(result).__name__,
+                'result': result.model_dump(),
+                'attempts': attempt,
+                'latency': round(time.perf_counter() - started, 4),
+            }
+        except asyncio.TimeoutError:
+            error = f'Timed out after {timeout}s'
+        except Exception as e:
+            error = f'{type(e).__name__}: {e}'
+        if attempt <= retries:
+            await asyncio.sleep(backoff * 2 ** (attempt - 1))
+    return {
+        'topic': topic,
+        'status': 'error',
+        'error': error,
+        'attempts': retries + 1,
+        'latency': round(time.perf_counter() - started, 4),
+    }
+
+async def run_batch(topics, output_path, generate_fn, concurrency=4, timeout=60.0, retries=2, backoff=1.0):
+    """
+    Run generate_fn over topics with at most `concurrency` requests in flight,
+    appending one JSON line per topic to output_path as it finishes. Topics
+    already completed in output_path are skipped. Returns a summary dict.
+    """
+    done = completed_topics(output_path)
+    queue = asyncio.Queue()
+    skipped = 0
+    seen = set()
+    for topic in topics:
+        if topic in done or topic in seen:
+            skipped += 1
+            continue
+        seen.add(topic)
+        queue.put_nowait(topic)
+
+    latencies = []
+    counts = {'ok': 0, 'error': 0}
+    started = time.perf_counter()
+
+    with open(output_path, 'a', encoding='utf-8') as output:
+        async def worker():
+            while True:
+                try:
+                    topic = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                record = await run_topic(topic, generate_fn, timeout, retries, backoff)
+                # Writes happen on the event loop thread, so lines never interleave
+                output.write(json.dumps(record) + '\n')
+                output.flush()
+                counts[record['status']] += 1
+                if record['status'] == 'ok':
+                    latencies.append(record['latency'])
+
+        await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+
+    elapsed = time.perf_counter() - started
+    processed = counts['ok'] + counts['error']
+    return {
+        'processed': processed,
+        'succeeded': counts['ok'],
+        'failed': counts['error'],
+        'skipped': skipped,
+        'elapsed_seconds': round(elapsed, 3),
+        'topics_per_sec': round(processed / elapsed, 3) if elapsed > 0 else None,
+        'latency_p50': percentile(latencies, 50),
+        'latency_p95': percentile(latencies, 95),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate refined research queries for a JSONL file of topics.')
+    parser.add_argument('input', help='JSONL file of topics')
+    parser.add_argument('output', help='JSONL file results are appended to (also used to resume)')
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--timeout', type=float, default=60.0, help='Per-request timeout in seconds')
+    parser.add_argument('--retries', type=int, default=2)
+    parser.add_argument('--model', default=MODEL_PARAMS['model'])
+    parser.add_argument('--no-cache', action='store_true', help="Don't read or write the response cache")
+    args = parser.parse_args()
+
+    cache = None if args.no_cache else LLMResponseCache()
+    model_params = {**MODEL_PARAMS, 'model': args.model}
+
+    async def generate_fn(topic):
+        # run_batch applies the per-request timeout itself
+        return await generate(topic, cache=cache, model_params=model_params, timeout=None)
+
+    summary = asyncio.run(run_batch(
+        read_topics(args.input),
+        args.output,
+        generate_fn,
+        concurrency=args.concurrency,
+        timeout=args.timeout,
+        retries=args.retries,
+    ))
+    if cache is not None:
+        summary['cache'] = cache.stats()
+        cache.close()
+    print(json.dumps(summary, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.llm_cache.sqlite3')
+DEFAULT_MAX_ENTRIES = 10000
+DEFAULT_TTL = 7 * 24 * 60 * 60  # one week, in seconds
+
+def normalize_topic(topic):
+    # Case and spacing don't change what the model is asked
+    return ' '.join(topic.casefold().split())
+
+def _sha256(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def make_cache_key(topic, template, output_model, model_params):
+    """
+    Key a response on everything that determines it: the normalized topic,
+    the prompt template, the output model (name and JSON schema) and the
+    model parameters (name, temperature, seed, ...).
+    """
+    key = {
+        'topic': normalize_topic(topic),
+        'template': _sha256(template),
+        'output_model': f'{output_model.__module__}.{output_model.__qualname__}',
+        'schema': _sha256(json.dumps(output_model.model_json_schema(), sort_keys=True)),
+        'model_params': model_params,
+    }
+    return _sha256(json.dumps(key, sort_keys=True))
+
+class LLMResponseCache:
+    """
+    Persistent cache of structured LLM responses, stored in a SQLite file so
+    it survives between runs. Entries expire after ttl seconds and the least
+    recently used ones are evicted beyond max_entries.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS responses ('
+                'key TEXT PRIMARY KEY, value TEXT NOT NULL, '
+                'created_at REAL NOT NULL, accessed_at REAL NOT NULL)'
+            )
+            self._conn.execute('CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)')
+
+    def get(self, key):
+        # Return the cached response dict, or None on a miss or expired entry
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute('SELECT value, created_at FROM responses WHERE key = ?', (key,)).fetchone()
+            if row is not None and self.ttl is not None and now - row[1] > self.ttl:
+                self._conn.execute('DELETE FROM responses WHERE key = ?', (key,))
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute('UPDATE responses SET accessed_at = ? WHERE key = ?', (now, key))
+            self.hits += 1
+            return json.loads(row[0])
+
+    def set(self, key, value):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO responses (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)',
+                (key, json.dumps(value), now, now),
+            )
+            self._evict()
+
+    def _evict(self):
+        if self.ttl is not None:
+            self._conn.execute('DELETE FROM responses WHERE created_at < ?', (time.time() - self.ttl,))
+        excess = self._conn.execute('SELECT COUNT(*) FROM responses').fetchone()[0] - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                'DELETE FROM responses WHERE key IN '
+                '(SELECT key FROM responses ORDER BY accessed_at LIMIT ?)',
+                (excess,),
+            )
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM responses')
+
+    def stats(self):
+        with self._lock:
+            entries = self._conn.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 4) if total else None,
+            'entries': entries,
+        }
+
+    def close(self):
+        self._conn.close()
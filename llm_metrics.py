@@ -0,0 +1,39 @@
+import time
+from langchain_core.callbacks import BaseCallbackHandler
+from app.metrics import LLM_CALL_SECONDS, LLM_TOKENS
+
+class LLMMetricsCallback(BaseCallbackHandler):
+    """
+    Records the latency and token counts of every chat model call into the
+    app.metrics histograms. Attached to the models built in LLM.py, so the
+    numbers show up on the Django metrics/ endpoint when the chains run there.
+    """
+
+    # Cheap enough to run on the event loop instead of in a thread pool
+    run_inline = True
+
+    def __init__(self):
+        self._started = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs):
+        model = (metadata or {}).get('ls_model_name') or 'unknown'
+        self._started[run_id] = (time.perf_counter(), model)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        started, model = self._started.pop(run_id, (None, 'unknown'))
+        if started is not None:
+            LLM_CALL_SECONDS.observe(time.perf_counter() - started, model=model, status='ok')
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, 'message', None), 'usage_metadata', None)
+                if usage:
+                    LLM_TOKENS.observe(usage.get('input_tokens', 0), model=model, direction='input')
+                    LLM_TOKENS.observe(usage.get('output_tokens', 0), model=model, direction='output')
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        started, model = self._started.pop(run_id, (None, 'unknown'))
+        if started is not None:
+            LLM_CALL_SECONDS.observe(time.perf_counter() - started, model=model, status='error')
+
+# One handler is shared by every chain; calls are told apart by run_id
+metrics_callback = LLMMetricsCallback()
@@ -14,3 +14,10 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'project.settings')
 
 application = get_asgi_application()
+
+from django.conf import settings  # noqa: E402
+
+if settings.LLM_PRELOAD:
+    # Pay for importing langchain, building the chains and loading the model now
+    from app.llm_service import preload
+    preload()